@@ -0,0 +1,66 @@
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import make_url
+from typing import Any, Callable, Dict, Tuple
+import functools
+import inspect
+
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(database_url: str) -> Tuple[Any, Dict[str, Any]]:
+    url = make_url(database_url)
+    url = url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    connect_args = {}
+    if url.drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        # asyncpg takes the libpq sslmode values through its own `ssl` argument
+        query = dict(url.query)
+        connect_args["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url, connect_args
+
+
+def blocking(endpoint: Callable) -> Callable:
+    # Endpoints doing non-database blocking work stay on the threadpool with a sync Session
+    endpoint.__blocking__ = True
+    return endpoint
+
+
+def bind_async_session(endpoint: Callable, get_session: Callable) -> Callable:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    signature = inspect.signature(endpoint)
+    if "db" not in signature.parameters or getattr(endpoint, "__blocking__", False) or getattr(endpoint, "__async_session__", False):
+        return endpoint
+
+    parameters = [
+        p.replace(annotation=AsyncSession, default=Depends(get_session)) if p.name == "db" else p
+        for p in signature.parameters.values()
+    ]
+
+    if inspect.iscoroutinefunction(endpoint):
+        async def wrapper(**kwargs):
+            return await endpoint(**kwargs)
+    else:
+        # Run the unchanged sync handler body on the AsyncSession's connection, on the event loop
+        async def wrapper(**kwargs):
+            session = kwargs.pop("db")
+            return await session.run_sync(lambda sync_session: endpoint(db=sync_session, **kwargs))
+
+    functools.update_wrapper(wrapper, endpoint)
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    wrapper.__async_session__ = True
+    return wrapper
+
+
+async def run_db(db, fn: Callable, *args):
+    # Lets async handlers run sync ORM code under either database mode
+    if hasattr(db, "run_sync"):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
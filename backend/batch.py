@@ -0,0 +1,73 @@
+from datetime import date, datetime, timezone
+from fastapi import HTTPException
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Callable, Dict, List, Optional, Type
+import json
+import uuid
+
+from serializers import encode
+
+MAX_BATCH_OPERATIONS = 100
+
+
+class BatchOperation(BaseModel):
+    op: str
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=128)
+    data: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class BatchRegistry:
+    # Typed operations applied in one transaction; each runs in a savepoint so a failure only drops itself
+    def __init__(self, idempotency_model):
+        self.idempotency_model = idempotency_model
+        self.operations: Dict[str, tuple] = {}
+
+    def register(self, name: str, payload_model: Type[BaseModel]):
+        def decorator(fn: Callable):
+            self.operations[name] = (payload_model, fn)
+            return fn
+        return decorator
+
+    def apply(self, db, user_id: str, operations: List[BatchOperation], today: date) -> List[Dict[str, Any]]:
+        model = self.idempotency_model
+        results = []
+        for index, operation in enumerate(operations):
+            result = {"index": index, "op": operation.op}
+            results.append(result)
+            if operation.op not in self.operations:
+                result.update(status=400, error=f"Unknown operation: {operation.op}")
+                continue
+            if operation.idempotency_key:
+                stored = db.query(model).filter(model.user_id == user_id, model.key == operation.idempotency_key).first()
+                if stored:
+                    result.update(status=200, result=stored.result, replayed=True)
+                    continue
+            payload_model, fn = self.operations[operation.op]
+            try:
+                payload = payload_model.model_validate(operation.data)
+            except ValidationError as exc:
+                result.update(status=422, error=exc.errors(include_url=False, include_context=False))
+                continue
+            savepoint = db.begin_nested()
+            try:
+                # Encoded like a single-call response, so stored, replayed and fresh results are identical
+                body = json.loads(encode(fn(db, user_id, payload, today)))
+                if operation.idempotency_key:
+                    db.add(model(id=str(uuid.uuid4()), user_id=user_id, key=operation.idempotency_key, operation=operation.op, result=body, created_at=datetime.now(timezone.utc)))
+                savepoint.commit()
+            except HTTPException as exc:
+                savepoint.rollback()
+                result.update(status=exc.status_code, error=exc.detail)
+                continue
+            except IntegrityError:
+                savepoint.rollback()
+                result.update(status=409, error="Conflicting operation")
+                continue
+            result.update(status=200, result=body)
+        db.commit()
+        return results
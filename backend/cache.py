@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import hashlib
+import threading
+import time
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock=time.monotonic, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # With a byte budget, values must support len() (bytes/str) and are sized by it
+        self.maxbytes = maxbytes
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] <= self._clock():
+                self._pop(key)
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        size = len(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = (value, expires, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def _pop(self, key: Hashable):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= item[2]
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "entries": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.maxbytes is not None:
+            stats.update(bytes=self.bytes, maxbytes=self.maxbytes)
+        return stats
+
+
+class RedisCache:
+    # Shared across workers; a cache outage degrades to misses instead of failing requests
+    def __init__(self, url: str):
+        import redis
+        self._errors = (redis.RedisError,)
+        self.client = redis.Redis.from_url(url)
+        self.errors = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self.client.get(key)
+        except self._errors:
+            self.errors += 1
+            return default
+        return default if value is None else value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        try:
+            self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+        except self._errors:
+            self.errors += 1
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(key)
+        except self._errors:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            memory = self.client.info("memory")
+        except self._errors:
+            self.errors += 1
+            memory = {}
+        return {"bytes": memory.get("used_memory"), "maxbytes": memory.get("maxmemory"), "errors": self.errors}
+
+
+class ReadCache:
+    # Response bodies keyed by the collection versions committed in the database, so any committed
+    # write is a miss on every worker; entries for superseded versions just age out
+    def __init__(self, backend, ttl: float = 60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, user_id: str, versions: Dict[str, int], variant: str = "") -> str:
+        tag = ".".join(f"{collection}-{version}" for collection, version in versions.items())
+        return f"read:{user_id}:{tag}:{hashlib.sha1(variant.encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self.backend.get(key)
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, key: str, body: bytes):
+        self.backend.set(key, body, ttl=self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__, "ttl": self.ttl,
+            "hits": self.hits, "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "store": self.backend.stats(),
+        }
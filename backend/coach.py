@@ -0,0 +1,112 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+MENTOR_PROMPTS = {
+    'hill': """You are Napoleon Hill, author of 'Think and Grow Rich'. You help people develop a success mindset and achieve their definite chief aim.
+
+Your coaching style:
+- Focus on the power of thought, desire, and persistence
+- Emphasize developing a burning desire and definite purpose
+- Teach the principles of auto-suggestion and faith
+- Help users overcome fear and develop a millionaire mindset
+- Speak with authority and inspiration
+
+Be encouraging, visionary, and help users see their unlimited potential.""",
+
+    'clear': """You are James Clear, author of 'Atomic Habits'. You help people build better habits through small, incremental changes.
+
+Your coaching style:
+- Focus on systems over goals
+- Teach the habit loop: cue, craving, response, reward
+- Emphasize making habits obvious, attractive, easy, and satisfying
+- Help users focus on identity-based habits
+- Use practical examples and scientific research
+
+Be practical, encouraging, and help users understand that small changes compound into remarkable results.""",
+
+    'holiday': """You are Ryan Holiday, author of 'The Obstacle Is The Way'. You help people apply Stoic philosophy to modern challenges.
+
+Your coaching style:
+- Focus on perception, action, and will
+- Teach that the obstacle in the path becomes the path
+- Help users reframe challenges as opportunities
+- Emphasize what's in their control vs what's not
+- Speak with calm wisdom and philosophical depth
+
+Be thoughtful, challenging, and help users see that every obstacle contains the seed of an equal or greater opportunity.""",
+}
+
+DEFAULT_MENTOR = 'hill'
+
+
+def resolve_mentor(mentor: str) -> str:
+    return mentor if mentor in MENTOR_PROMPTS else DEFAULT_MENTOR
+
+
+def build_prompt(context: Dict[str, int], message: str) -> str:
+    # User context travels with the message so each persona's system instruction stays fixed
+    return f"""User Context:
+- Active Goals: {context['goals']}
+- Habits Tracked: {context['habits']}
+- Recent Reflections: {context['reflections']}
+
+{message}"""
+
+
+def normalize_message(message: str) -> str:
+    return " ".join(message.lower().split()).strip(" ?!.")
+
+
+def response_cache_key(mentor: str, message: str, context: Dict[str, int]) -> Tuple:
+    return (mentor, normalize_message(message), context['goals'], context['habits'], context['reflections'])
+
+
+class CoachProvider(ABC):
+    # Set by the server to record token usage as fn(mentor, prompt_tokens, completion_tokens)
+    on_usage: Optional[Callable[[str, int, int], None]] = None
+
+    def report_usage(self, mentor: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        if self.on_usage is not None:
+            self.on_usage(mentor, prompt_tokens or 0, completion_tokens or 0)
+
+    # `history` holds earlier turns as {"role": "user" | "model", "text": ...}, oldest first
+    @abstractmethod
+    async def generate(self, mentor: str, prompt: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+        ...
+
+    async def stream(self, mentor: str, prompt: str, history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        # Providers without native streaming yield the whole reply as one chunk
+        yield await self.generate(mentor, prompt, history)
+
+
+class GeminiProvider(CoachProvider):
+    def __init__(self, model_name: str = 'gemini-2.0-flash'):
+        self.model_name = model_name
+        self._models = {}
+
+    def model(self, mentor: str):
+        if mentor not in self._models:
+            import google.generativeai as genai
+            self._models[mentor] = genai.GenerativeModel(self.model_name, system_instruction=MENTOR_PROMPTS[mentor])
+        return self._models[mentor]
+
+    def chat(self, mentor: str, history: Optional[List[Dict[str, str]]]):
+        return self.model(mentor).start_chat(history=[{"role": t["role"], "parts": [t["text"]]} for t in history or []])
+
+    async def generate(self, mentor: str, prompt: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+        response = await self.chat(mentor, history).send_message_async(prompt)
+        self.record_usage(mentor, response)
+        return response.text
+
+    async def stream(self, mentor: str, prompt: str, history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        response = await self.chat(mentor, history).send_message_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+        # Streamed responses carry the totals once fully consumed
+        self.record_usage(mentor, response)
+
+    def record_usage(self, mentor: str, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.report_usage(mentor, getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0))
@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List
+
+from cache import TTLCache
+
+Turn = Dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough ~4 characters per token; only used to bound prompt size
+    return len(text) // 4 + 1
+
+
+def trim_history(history: List[Turn], max_tokens: int) -> List[Turn]:
+    kept, used = [], 0
+    for turn in reversed(history):
+        cost = estimate_tokens(turn["text"])
+        if used + cost > max_tokens:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+    # Chat history has to open with a user turn
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
+
+
+class SessionStore(ABC):
+    @abstractmethod
+    async def load(self, user_id: str, session_id: str) -> List[Turn]:
+        ...
+
+    @abstractmethod
+    async def save(self, user_id: str, session_id: str, mentor: str, history: List[Turn]):
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400.0):
+        self.sessions = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def load(self, user_id: str, session_id: str) -> List[Turn]:
+        return list(self.sessions.get((user_id, session_id), []))
+
+    async def save(self, user_id: str, session_id: str, mentor: str, history: List[Turn]):
+        self.sessions.set((user_id, session_id), tuple(history))
+
+
+class DatabaseSessionStore(SessionStore):
+    # Uses its own short-lived sessions so streaming replies can save after the request's session closed
+    def __init__(self, session_factory, model):
+        self.session_factory = session_factory
+        self.model = model
+
+    def _load(self, user_id: str, session_id: str) -> List[Turn]:
+        with self.session_factory() as db:
+            row = db.query(self.model).filter(self.model.id == session_id, self.model.user_id == user_id).first()
+            return list(row.history or []) if row else []
+
+    def _save(self, user_id: str, session_id: str, mentor: str, history: List[Turn]):
+        with self.session_factory() as db:
+            row = db.query(self.model).filter(self.model.id == session_id).first()
+            if row is None:
+                row = self.model(id=session_id, user_id=user_id)
+                db.add(row)
+            elif row.user_id != user_id:
+                return
+            row.mentor = mentor
+            row.history = history
+            row.updated_at = datetime.now(timezone.utc)
+            db.commit()
+
+    async def load(self, user_id: str, session_id: str) -> List[Turn]:
+        return await run_in_threadpool(self._load, user_id, session_id)
+
+    async def save(self, user_id: str, session_id: str, mentor: str, history: List[Turn]):
+        await run_in_threadpool(self._save, user_id, session_id, mentor, history)
@@ -0,0 +1,8 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def insert_for(bind, table):
+    # Dialect-specific INSERT so callers can use on_conflict_do_nothing / on_conflict_do_update
+    if bind.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
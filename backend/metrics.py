@@ -0,0 +1,368 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import math
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384)
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self.capacity = None
+        self.wait_seconds = Histogram()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def incr(self, attr: str):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def attach(self, engine, capacity: int = None):
+        # Engine-level listeners survive pool.recreate() on dispose
+        event.listen(engine, "connect", lambda *args: self.incr("connects"))
+        event.listen(engine, "checkout", lambda *args: self.incr("checkouts"))
+        event.listen(engine, "invalidate", lambda *args: self.incr("invalidations"))
+        self.engine = engine
+        self.capacity = capacity
+
+    def snapshot(self) -> Dict:
+        pool = self.engine.pool if self.engine is not None else None
+        stats = {
+            "pool": type(pool).__name__ if pool is not None else None,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "capacity": self.capacity,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+def instrumented_pool_class(base, stats: PoolStats):
+    # Times every checkout, including waits for a free slot and pre-ping round trips
+    class InstrumentedPool(base):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                stats.incr("timeouts")
+                raise
+            finally:
+                stats.wait_seconds.observe(time.perf_counter() - started)
+
+    InstrumentedPool.__name__ = base.__name__
+    return InstrumentedPool
+
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield self.name, dict(zip(self.labels, label_values)), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *values: str, amount: float = 1.0):
+        self.inc(*values, amount=-amount)
+
+    def set(self, *values: str, value: float):
+        with self._lock:
+            self._values[values] = value
+
+
+class LabeledHistogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *values: str):
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, Histogram(self.buckets))
+        series.observe(value)
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            series = list(self._series.items())
+        for label_values, histogram in series:
+            yield from histogram_samples(self.name, dict(zip(self.labels, label_values)), histogram.snapshot())
+
+
+def histogram_samples(name: str, labels: Dict[str, str], snapshot: Dict) -> Iterator[Tuple[str, Dict[str, str], float]]:
+    for bound, count in snapshot["buckets"].items():
+        yield f"{name}_bucket", {**labels, "le": bound}, count
+    yield f"{name}_sum", labels, snapshot["sum"]
+    yield f"{name}_count", labels, snapshot["count"]
+
+
+class Collected:
+    # Point-in-time values read from objects that keep their own stats (pools, caches)
+    def __init__(self, name: str, kind: str, help: str, samples: List[Tuple[str, Dict[str, str], float]]):
+        self.name, self.kind, self.help, self._samples = name, kind, help, samples
+
+    def samples(self):
+        return iter(self._samples)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Any] = []
+        self.collectors: List[Callable[[], Iterable[Collected]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> LabeledHistogram:
+        return self.register(LabeledHistogram(name, help, labels, buckets))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[Collected]]):
+        self.collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        # Prometheus text exposition format 0.0.4
+        lines = []
+        families = list(self.metrics)
+        for collect in self.collectors:
+            families.extend(collect())
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for name, labels, value in family.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Set per request by MetricsMiddleware; threadpool handlers and run_sync see the same object via the copied context
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class HttpMetrics:
+    def __init__(self, registry: Registry):
+        self.requests = registry.counter("http_requests_total", "Requests by route, method and status.", ("method", "route", "status"))
+        self.duration = registry.histogram("http_request_duration_seconds", "Request latency until the last body byte.", ("method", "route"))
+        self.in_progress = registry.gauge("http_requests_in_progress", "Requests currently being served.", ("method",))
+        self.request_queries = registry.histogram("http_request_db_queries", "SQL statements executed per request.", ("route",), QUERY_COUNT_BUCKETS)
+        self.request_db_seconds = registry.histogram("http_request_db_seconds", "Time spent in SQL per request.", ("route",))
+        self.queries = registry.counter("db_queries_total", "SQL statements executed.", ("engine",))
+        self.query_errors = registry.counter("db_query_errors_total", "SQL statements that raised.", ("engine",))
+        self.query_duration = registry.histogram("db_query_duration_seconds", "Latency of single SQL statements.", ("engine",))
+
+    def instrument_engine(self, engine, name: str):
+        # Cursor-level hooks, so ORM, Core and raw text() statements are all counted
+        @event.listens_for(engine, "before_cursor_execute")
+        def started(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def finished(conn, cursor, statement, parameters, context, executemany):
+            self._finish(conn, name)
+
+        @event.listens_for(engine, "handle_error")
+        def failed(context):
+            if context.connection is not None and context.connection.info.get("query_started"):
+                self._finish(context.connection, name)
+                self.query_errors.inc(name)
+
+    def _finish(self, conn, name: str):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        self.queries.inc(name)
+        self.query_duration.observe(elapsed, name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+class MetricsMiddleware:
+    # Pure ASGI so streaming responses are timed to their last chunk and nothing is buffered
+    def __init__(self, app, metrics: HttpMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_progress.dec(method)
+            current_request.reset(token)
+            # The matched route's template, never the raw path, keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.metrics.requests.inc(method, route, str(status))
+            self.metrics.duration.observe(elapsed, method, route)
+            self.metrics.request_queries.observe(stats.queries, route)
+            self.metrics.request_db_seconds.observe(stats.db_seconds, route)
+
+
+class CoachMetrics:
+    def __init__(self, registry: Registry):
+        self.upstream = registry.histogram("coach_upstream_duration_seconds", "AI coach provider call latency.", ("mentor", "call", "outcome"))
+        self.first_chunk = registry.histogram("coach_first_chunk_seconds", "Time to the first streamed AI coach chunk.", ("mentor",))
+        self.tokens = registry.counter("coach_tokens_total", "AI coach tokens reported by the provider.", ("mentor", "kind"))
+        self.response_tokens = registry.histogram("coach_response_tokens", "Completion tokens per AI coach reply.", ("mentor",), TOKEN_BUCKETS)
+
+    @contextmanager
+    def timed(self, mentor: str, call: str):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.upstream.observe(time.perf_counter() - started, mentor, call, outcome)
+
+    def record_usage(self, mentor: str, prompt_tokens: int, completion_tokens: int):
+        self.tokens.inc(mentor, "prompt", amount=prompt_tokens)
+        self.tokens.inc(mentor, "completion", amount=completion_tokens)
+        self.response_tokens.observe(completion_tokens, mentor)
+
+
+def pool_collector(pools: Dict[str, PoolStats]) -> Callable[[], List[Collected]]:
+    def collect() -> List[Collected]:
+        snapshots = {name: stats.snapshot() for name, stats in pools.items()}
+        families = [
+            Collected("db_pool_checkouts_total", "counter", "Connections checked out of the pool.", [("db_pool_checkouts_total", {"pool": n}, s["checkouts"]) for n, s in snapshots.items()]),
+            Collected("db_pool_connects_total", "counter", "New DBAPI connections opened.", [("db_pool_connects_total", {"pool": n}, s["connects"]) for n, s in snapshots.items()]),
+            Collected("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.", [("db_pool_timeouts_total", {"pool": n}, s["timeouts"]) for n, s in snapshots.items()]),
+            Collected("db_pool_checked_out", "gauge", "Connections currently in use.", [("db_pool_checked_out", {"pool": n}, s["checked_out"]) for n, s in snapshots.items() if "checked_out" in s]),
+            Collected("db_pool_capacity", "gauge", "Pool size plus max overflow.", [("db_pool_capacity", {"pool": n}, s["capacity"]) for n, s in snapshots.items() if s["capacity"] is not None]),
+        ]
+        wait = [sample for n, s in snapshots.items() for sample in histogram_samples("db_pool_wait_seconds", {"pool": n}, s["wait_seconds"])]
+        families.append(Collected("db_pool_wait_seconds", "histogram", "Time to check a connection out of the pool.", wait))
+        return families
+    return collect
+
+
+def stats_collector(name: str, help: str, sources: Callable[[], Dict[str, Optional[Dict[str, Any]]]], fields: Tuple[str, ...]) -> Callable[[], List[Collected]]:
+    # Exposes numeric fields of existing stats() dicts (caches, hashing pool) as gauges labelled by source
+    def collect() -> List[Collected]:
+        stats = {source: values for source, values in sources().items() if values}
+        return [
+            Collected(f"{name}_{field}", "gauge", f"{help} ({field}).", [
+                (f"{name}_{field}", {"source": source}, values[field]) for source, values in stats.items()
+                if isinstance(values.get(field), (int, float)) and not isinstance(values.get(field), bool)
+            ])
+            for field in fields
+        ]
+    return collect
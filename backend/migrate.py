@@ -0,0 +1,33 @@
+from dotenv import load_dotenv
+from pathlib import Path
+import argparse
+import logging
+import sys
+
+load_dotenv(Path(__file__).parent / '.env')
+
+import server
+from migrations import migration_status, run_migrations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply or inspect database schema migrations. Run once per deploy, before starting the workers.")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=("upgrade", "status"))
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    engine = server.init_db(args.database_url) if args.database_url or server.engine is None else server.engine
+    if args.command == "status":
+        pending = 0
+        for version, name, applied_at in migration_status(engine):
+            pending += applied_at is None
+            print(f"{version:>4}  {'pending' if applied_at is None else applied_at.isoformat(timespec='seconds'):<25}  {name}")
+        print(f"{pending} pending")
+        return 1 if pending else 0
+    applied = run_migrations(engine, server.Base.metadata)
+    logging.getLogger(__name__).info(f"Schema up to date ({len(applied)} migration(s) applied)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, func, inspect, select, text
+from collections import defaultdict
+from datetime import date, datetime, timezone
+import json
+import logging
+import uuid
+
+from dialects import insert_for
+from search import create_search_index
+from streaks import StreakState, advance, reset
+
+logger = logging.getLogger(__name__)
+
+version_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations", version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+
+def create_index(connection, table_name: str, index_name: str, columns, unique: bool = False):
+    # Works against the reflected table so migrations never depend on the current models
+    existing = {ix["name"] for ix in inspect(connection).get_indexes(table_name)}
+    if index_name in existing:
+        return
+    table = Table(table_name, MetaData(), autoload_with=connection)
+    Index(index_name, *[table.c[c] for c in columns], unique=unique).create(bind=connection)
+
+
+USER_INDEXES = [
+    ("goals", "ix_goals_user_created", ("user_id", "created_at")),
+    ("habits", "ix_habits_user_created", ("user_id", "created_at")),
+    ("vision_board", "ix_vision_board_user_created", ("user_id", "created_at")),
+    ("journal", "ix_journal_user_date", ("user_id", "date")),
+    ("journal", "ix_journal_user_created", ("user_id", "created_at")),
+    ("exercises", "ix_exercises_user_date", ("user_id", "date")),
+    ("ritual_completions", "ix_ritual_completions_user_completed", ("user_id", "completed_at")),
+    ("wisdom_favorites", "ix_wisdom_favorites_user_quote", ("user_id", "quote_id")),
+    ("wisdom_favorites", "ix_wisdom_favorites_user_created", ("user_id", "created_at")),
+    ("identity_statements", "ix_identity_statements_user_created", ("user_id", "created_at")),
+    ("identity_evidence", "ix_identity_evidence_user_identity", ("user_id", "identity_id", "created_at")),
+    ("obstacles", "ix_obstacles_user_created", ("user_id", "created_at")),
+    ("desire_visualizations", "ix_desire_visualizations_user_created", ("user_id", "created_at")),
+    ("premeditatio_practices", "ix_premeditatio_practices_user_created", ("user_id", "created_at")),
+    ("habit_chains", "ix_habit_chains_user_created", ("user_id", "created_at")),
+    ("habit_chain_completions", "ix_habit_chain_completions_user_chain", ("user_id", "chain_id", "date")),
+    ("journey_milestones", "ix_journey_milestones_user_date", ("user_id", "date")),
+    ("morning_routines", "ix_morning_routines_user_created", ("user_id", "created_at")),
+    ("morning_routine_completions", "ix_morning_routine_completions_user_routine", ("user_id", "routine_id", "date")),
+]
+
+
+@migration(1, "per-user composite indexes")
+def add_user_indexes(connection, metadata):
+    for table_name, index_name, columns in USER_INDEXES:
+        create_index(connection, table_name, index_name, columns)
+
+
+@migration(2, "backfill habit_completions from habits.completion_dates")
+def backfill_habit_completions(connection, metadata):
+    habits = Table("habits", MetaData(), autoload_with=connection)
+    completions = Table("habit_completions", MetaData(), autoload_with=connection)
+    now = datetime.now(timezone.utc)
+    insert_stmt = insert_for(connection, completions).on_conflict_do_nothing(index_elements=["habit_id", "date"])
+    rows = connection.execute(
+        select(habits.c.id, habits.c.user_id, habits.c.completion_dates)
+        .where(habits.c.completion_dates.isnot(None))
+    ).all()
+    batch = []
+    for habit_id, user_id, dates in rows:
+        if isinstance(dates, str):
+            dates = json.loads(dates)
+        for date in set(dates or []):
+            batch.append({"id": str(uuid.uuid4()), "habit_id": habit_id, "user_id": user_id, "date": date, "created_at": now})
+        if len(batch) >= 1000:
+            connection.execute(insert_stmt, batch)
+            batch = []
+    if batch:
+        connection.execute(insert_stmt, batch)
+
+
+@migration(3, "backfill journal and habit chain streaks")
+def backfill_streaks(connection, metadata):
+    journal = Table("journal", MetaData(), autoload_with=connection)
+    chain_completions = Table("habit_chain_completions", MetaData(), autoload_with=connection)
+    streaks = Table("streaks", MetaData(), autoload_with=connection)
+    states = defaultdict(StreakState)
+    for user_id, day in connection.execute(
+        select(journal.c.user_id, journal.c.date).distinct().order_by(journal.c.user_id, journal.c.date)
+    ):
+        key = (user_id, "journal", user_id)
+        states[key] = advance(states[key], date.fromisoformat(day[:10]))
+    for user_id, chain_id, success, day in connection.execute(
+        select(chain_completions.c.user_id, chain_completions.c.chain_id, chain_completions.c.success, chain_completions.c.date)
+        .order_by(chain_completions.c.chain_id, chain_completions.c.date, chain_completions.c.created_at)
+    ):
+        key = (user_id, "habit_chain", chain_id)
+        day = date.fromisoformat(day[:10])
+        states[key] = advance(states[key], day) if success else reset(states[key], day)
+    now = datetime.now(timezone.utc)
+    rows = [{
+        "id": str(uuid.uuid4()), "user_id": user_id, "entity_type": entity_type, "entity_id": entity_id,
+        "current_streak": state.current, "best_streak": state.best,
+        "last_date": state.last_date.isoformat() if state.last_date else None, "updated_at": now,
+    } for (user_id, entity_type, entity_id), state in states.items()]
+    for start in range(0, len(rows), 1000):
+        connection.execute(
+            insert_for(connection, streaks).on_conflict_do_nothing(index_elements=["user_id", "entity_type", "entity_id"]),
+            rows[start:start + 1000],
+        )
+
+
+# Table -> column that seeds updated_at for existing rows
+SYNC_TABLES = [
+    ("goals", "created_at"),
+    ("habits", "created_at"),
+    ("vision_board", "created_at"),
+    ("journal", "created_at"),
+    ("exercises", "created_at"),
+    ("ritual_completions", "completed_at"),
+    ("wisdom_favorites", "created_at"),
+    ("identity_statements", "created_at"),
+    ("identity_evidence", "created_at"),
+    ("obstacles", "created_at"),
+    ("burning_desires", "created_at"),
+    ("desire_visualizations", "created_at"),
+    ("premeditatio_practices", "created_at"),
+    ("habit_chains", "created_at"),
+    ("journey_milestones", "created_at"),
+    ("legacy_statements", "created_at"),
+    ("morning_routines", "created_at"),
+]
+
+
+@migration(4, "updated_at watermarks for delta sync")
+def add_sync_watermarks(connection, metadata):
+    quote = connection.dialect.identifier_preparer.quote
+    column_type = DateTime().compile(dialect=connection.dialect)
+    for table_name, source in SYNC_TABLES:
+        columns = {c["name"] for c in inspect(connection).get_columns(table_name)}
+        if "updated_at" not in columns:
+            connection.execute(text(f"ALTER TABLE {quote(table_name)} ADD COLUMN updated_at {column_type}"))
+        connection.execute(text(f"UPDATE {quote(table_name)} SET updated_at = {quote(source)} WHERE updated_at IS NULL"))
+        create_index(connection, table_name, f"ix_{table_name}_user_updated", ("user_id", "updated_at"))
+
+
+@migration(5, "unique wisdom favorites per user and quote")
+def unique_wisdom_favorites(connection, metadata):
+    favorites = Table("wisdom_favorites", MetaData(), autoload_with=connection)
+    tombstones = Table("tombstones", MetaData(), autoload_with=connection)
+    duplicates = connection.execute(
+        select(favorites.c.user_id, favorites.c.quote_id)
+        .group_by(favorites.c.user_id, favorites.c.quote_id)
+        .having(func.count() > 1)
+    ).all()
+    now = datetime.now(timezone.utc)
+    for user_id, quote_id in duplicates:
+        # Keep the earliest favorite; the rest become tombstones so synced clients drop them too
+        ids = connection.execute(
+            select(favorites.c.id)
+            .where(favorites.c.user_id == user_id, favorites.c.quote_id == quote_id)
+            .order_by(favorites.c.created_at, favorites.c.id)
+        ).scalars().all()
+        connection.execute(favorites.delete().where(favorites.c.id.in_(ids[1:])))
+        connection.execute(tombstones.insert(), [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "collection": "wisdom_favorites", "row_id": row_id, "deleted_at": now}
+            for row_id in ids[1:]
+        ])
+    create_index(connection, "wisdom_favorites", "uq_wisdom_favorites_user_quote", ("user_id", "quote_id"), unique=True)
+    if "ix_wisdom_favorites_user_quote" in {ix["name"] for ix in inspect(connection).get_indexes("wisdom_favorites")}:
+        Index("ix_wisdom_favorites_user_quote", favorites.c.user_id, favorites.c.quote_id).drop(bind=connection)
+
+
+@migration(6, "full-text search index")
+def add_search_index(connection, metadata):
+    create_search_index(connection)
+
+
+# Arbitrary constant: one deploy at a time applies migrations on Postgres
+MIGRATION_LOCK_ID = 7_204_311
+
+
+def run_migrations(engine, metadata) -> list:
+    applied_now = []
+    with engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        version_metadata.create_all(bind=connection)
+        # Tables new to the models are created first; versioned migrations then change existing ones
+        metadata.create_all(bind=connection)
+        applied = set(connection.execute(select(schema_migrations.c.version)).scalars())
+        for version, name, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if version in applied:
+                continue
+            logger.info(f"Applying migration {version}: {name}")
+            fn(connection, metadata)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc)
+            ))
+            applied_now.append((version, name))
+    return applied_now
+
+
+def migration_status(engine) -> list:
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("schema_migrations"):
+            applied = {}
+        else:
+            applied = dict(connection.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at)).all())
+    return [(version, name, applied.get(version)) for version, name, _ in sorted(MIGRATIONS, key=lambda m: m[0])]
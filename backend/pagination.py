@@ -0,0 +1,80 @@
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import DateTime, and_, or_
+from typing import NamedTuple, Optional, Sequence
+from datetime import datetime
+import base64
+import json
+
+MAX_PAGE_SIZE = 200
+DEFAULT_PAGE_SIZE = 50
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams(NamedTuple):
+    limit: int
+    cursor: Optional[str]
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+) -> PageParams:
+    return PageParams(limit, cursor)
+
+
+def encode_cursor(values: Sequence) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_columns(sort_columns, id_column) -> tuple:
+    # sort_columns may be a tuple to break ties within coarse keys such as a day
+    return (sort_columns if isinstance(sort_columns, tuple) else (sort_columns,)) + (id_column,)
+
+
+def paginate(query, sort_columns, id_column, page: PageParams, response: Response):
+    # Keyset pagination, newest first: (sort..., id) < cursor, so each page is one index range scan.
+    # Column projections must select every keyset column so the next cursor can be built
+    columns = keyset_columns(sort_columns, id_column)
+    if page.cursor:
+        values = decode_cursor(page.cursor, columns)
+        query = query.filter(or_(*(
+            and_(*(column == value for column, value in zip(columns[:index], values)), columns[index] < values[index])
+            for index in range(len(columns))
+        )))
+    query = query.order_by(*(column.desc() for column in columns))
+    rows = query.limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows
+
+
+def encode_offset(offset: int) -> str:
+    # Ranked results have no stable sort key, so their cursor is an opaque offset
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_offset(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["offset"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
@@ -0,0 +1,230 @@
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger("query_profile")
+
+PROFILE_HEADER = "X-Query-Profile"
+PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+PLACEHOLDER_LIST = re.compile(rf"\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})+\s*\)")
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    # Statements differing only in literals or IN-list length share a shape, so loops show up as repeats
+    shape = WHITESPACE.sub(" ", statement).strip()
+    shape = STRING_LITERAL.sub("?", shape)
+    shape = PLACEHOLDER_LIST.sub("(...)", shape)
+    return NUMBER_LITERAL.sub("?", shape)
+
+
+def seq_scans(plan: Any) -> List[str]:
+    # Walks a Postgres EXPLAIN (FORMAT JSON) tree
+    scans, nodes = [], [node["Plan"] for node in plan] if isinstance(plan, list) else [plan]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(f"{node.get('Relation Name')} (~{node.get('Plan Rows')} rows)")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def explain_statement(dialect: str) -> Optional[str]:
+    if dialect == "postgresql":
+        return "EXPLAIN (FORMAT JSON) "
+    if dialect == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    return None
+
+
+def parse_plan(dialect: str, rows: List[tuple]) -> List[str]:
+    if dialect == "postgresql":
+        plan = rows[0][0]
+        return seq_scans(json.loads(plan) if isinstance(plan, str) else plan)
+    # SQLite: "SCAN <table>" without an index is a full table scan; constants, subqueries and FTS lookups are not
+    return [
+        row[-1] for row in rows
+        if row[-1].startswith("SCAN ") and " USING " not in row[-1]
+        and not row[-1].startswith(("SCAN CONSTANT ROW", "SCAN (")) and "VIRTUAL TABLE" not in row[-1]
+    ]
+
+
+class Statement:
+    __slots__ = ("shape", "statement", "parameters", "seconds", "engine")
+
+    def __init__(self, shape: str, statement: str, parameters: Any, seconds: float, engine: str):
+        self.shape = shape
+        self.statement = statement
+        self.parameters = parameters
+        self.seconds = seconds
+        self.engine = engine
+
+
+class RequestProfile:
+    def __init__(self):
+        self.statements: List[Statement] = []
+
+    def summary(self, repeat_threshold: int) -> Dict[str, Any]:
+        counts = Counter(statement.shape for statement in self.statements)
+        return {
+            "queries": len(self.statements),
+            "db_ms": round(sum(statement.seconds for statement in self.statements) * 1000, 3),
+            "repeated": {shape: n for shape, n in counts.items() if n >= repeat_threshold},
+        }
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class QueryProfiler:
+    # Dev-mode only: keeps every statement of a request in memory and EXPLAINs each new SELECT shape once
+    def __init__(self, repeat_threshold: int = 3, explain: bool = True):
+        self.repeat_threshold = repeat_threshold
+        self.explain = explain
+        self.engines: Dict[str, Any] = {}
+        self.plans: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"requests": 0, "queries": 0, "max_queries": 0, "db_seconds": 0.0})
+            self.shapes: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "routes": set(), "max_per_request": 0})
+
+    def attach(self, engine, name: str, async_engine=None):
+        # `engine` is the sync Engine the hooks see; EXPLAIN goes through async_engine when given
+        self.engines[name] = async_engine or engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def started(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def finished(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+            profile = current_profile.get()
+            if profile is not None:
+                profile.statements.append(Statement(statement_shape(statement), statement, None if executemany else parameters, elapsed, name))
+
+        @event.listens_for(engine, "handle_error")
+        def failed(context):
+            if context.connection is not None and context.connection.info.get("profile_started"):
+                context.connection.info["profile_started"].pop()
+
+    async def explain_new_shapes(self, profile: RequestProfile):
+        for statement in profile.statements:
+            if statement.shape in self.plans or statement.parameters is None:
+                continue
+            if not statement.shape.upper().startswith(("SELECT", "WITH")):
+                continue
+            # Mark first so concurrent requests don't EXPLAIN the same shape twice
+            self.plans[statement.shape] = []
+            try:
+                self.plans[statement.shape] = await self._explain(statement)
+            except Exception as e:
+                logger.debug(f"EXPLAIN failed for {statement.shape}: {e}")
+
+    async def _explain(self, statement: Statement) -> List[str]:
+        engine = self.engines[statement.engine]
+        prefix = explain_statement(engine.dialect.name)
+        if prefix is None:
+            return []
+        if hasattr(engine, "sync_engine"):
+            async with engine.connect() as connection:
+                rows = (await connection.exec_driver_sql(prefix + statement.statement, statement.parameters)).all()
+        else:
+            def run():
+                with engine.connect() as connection:
+                    return connection.exec_driver_sql(prefix + statement.statement, statement.parameters).all()
+            rows = await run_in_threadpool(run)
+        return parse_plan(engine.dialect.name, rows)
+
+    def record(self, route: str, profile: RequestProfile) -> Dict[str, Any]:
+        summary = profile.summary(self.repeat_threshold)
+        per_request = Counter(statement.shape for statement in profile.statements)
+        scans = {shape: self.plans[shape] for shape in per_request if self.plans.get(shape)}
+        with self._lock:
+            stats = self.routes[route]
+            stats["requests"] += 1
+            stats["queries"] += summary["queries"]
+            stats["max_queries"] = max(stats["max_queries"], summary["queries"])
+            stats["db_seconds"] += summary["db_ms"] / 1000
+            for statement in profile.statements:
+                shape = self.shapes[statement.shape]
+                shape["count"] += 1
+                shape["seconds"] += statement.seconds
+                shape["max_seconds"] = max(shape["max_seconds"], statement.seconds)
+                shape["routes"].add(route)
+            for shape, n in per_request.items():
+                self.shapes[shape]["max_per_request"] = max(self.shapes[shape]["max_per_request"], n)
+        return {**summary, "scans": scans}
+
+    def report(self, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": s["requests"], "mean_queries": round(s["queries"] / s["requests"], 2), "max_queries": s["max_queries"],
+                    "mean_db_ms": round(s["db_seconds"] * 1000 / s["requests"], 3),
+                }
+                for route, s in self.routes.items()
+            }
+            shapes = [
+                {
+                    "shape": shape, "count": s["count"], "total_ms": round(s["seconds"] * 1000, 3), "mean_ms": round(s["seconds"] * 1000 / s["count"], 3),
+                    "max_ms": round(s["max_seconds"] * 1000, 3), "max_per_request": s["max_per_request"], "routes": sorted(s["routes"]),
+                    "repeated": s["max_per_request"] >= self.repeat_threshold, "scans": self.plans.get(shape, []),
+                }
+                for shape, s in self.shapes.items()
+            ]
+        shapes.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {
+            "routes": dict(sorted(routes.items(), key=lambda item: item[1]["mean_db_ms"], reverse=True)),
+            "shapes": shapes[:limit],
+            "repeated": [s for s in shapes if s["repeated"]],
+            "scans": [s for s in shapes if s["scans"]],
+        }
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+
+        async def send_with_profile(message):
+            # Headers go out before streamed bodies finish, so the header covers statements run up to this point
+            if message["type"] == "http.response.start":
+                summary = profile.summary(self.profiler.repeat_threshold)
+                value = f"queries={summary['queries']}; db_ms={summary['db_ms']}; repeated={len(summary['repeated'])}"
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_HEADER.lower().encode("latin-1"), value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            current_profile.reset(token)
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        if self.profiler.explain:
+            await self.profiler.explain_new_shapes(profile)
+        summary = self.profiler.record(route, profile)
+        flagged = summary["repeated"] or summary["scans"]
+        logger.log(
+            logging.WARNING if flagged else logging.INFO,
+            f"{scope['method']} {route} queries={summary['queries']} db_ms={summary['db_ms']}"
+            + "".join(f"\n  repeated x{n}: {shape}" for shape, n in summary["repeated"].items())
+            + "".join(f"\n  full scan {', '.join(scans)}: {shape}" for shape, scans in summary["scans"].items()),
+        )
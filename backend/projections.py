@@ -0,0 +1,33 @@
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import JSON
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in names if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names or None
+
+
+def column_query(db, model, names: Iterable[str], keys: Sequence[str] = ("id",)):
+    # Plain column rows: no ORM instances, identity map or unselected Text/JSON payloads
+    table = model.__table__
+    return db.query(*[table.c[n] for n in dict.fromkeys([*keys, *names]) if n in table.c])
+
+
+def format_value(column, value) -> Any:
+    if value is None and isinstance(column.type, JSON):
+        return []
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def project_rows(model, rows, names: Sequence[str]) -> List[Dict[str, Any]]:
+    columns = [(n, model.__table__.c[n]) for n in names if n in model.__table__.c]
+    return [{n: format_value(c, getattr(row, n)) for n, c in columns} for row in rows]
@@ -0,0 +1,51 @@
+from datetime import date
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+
+
+class Quote(NamedTuple):
+    id: str
+    text: str
+    category: str
+    philosophy_key: str
+    philosophy: str
+    author: str
+
+
+class QuoteCatalog:
+    # Loaded once at startup; lookups are read-only, so it is shared across requests without locking
+    def __init__(self, quotes: Tuple[Quote, ...]):
+        self.quotes = quotes
+        self.by_id = MappingProxyType({quote.id: quote for quote in quotes})
+        self.payloads = MappingProxyType({quote.id: MappingProxyType(quote._asdict()) for quote in quotes})
+        self.etag = '"quotes-' + hashlib.sha256(json.dumps([q._asdict() for q in quotes]).encode("utf-8")).hexdigest()[:16] + '"'
+
+    @classmethod
+    def load(cls, path: Path) -> "QuoteCatalog":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(tuple(
+            Quote(q["id"], q["text"], q["category"], p["key"], p["name"], p["author"])
+            for p in data["philosophies"] for q in p["quotes"]
+        ))
+
+    def __contains__(self, quote_id: str) -> bool:
+        return quote_id in self.by_id
+
+    def payload(self, quote_id: str) -> Optional[Dict[str, Any]]:
+        payload = self.payloads.get(quote_id)
+        return dict(payload) if payload is not None else None
+
+    def filter(self, philosophy: Optional[str] = None, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [
+            dict(self.payloads[q.id]) for q in self.quotes
+            if (philosophy is None or q.philosophy_key == philosophy) and (category is None or q.category == category)
+        ]
+
+    def quote_of_the_day(self, user_id: str, day: date) -> Quote:
+        # Stable for a user for the whole day, and spread evenly across the catalog between users
+        digest = hashlib.sha256(f"{user_id}:{day.isoformat()}".encode("utf-8")).digest()
+        return self.quotes[int.from_bytes(digest[:8], "big") % len(self.quotes)]
@@ -0,0 +1,154 @@
+from fastapi import HTTPException
+from sqlalchemy import text
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import re
+
+SEARCH_LANGUAGE = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+HIGHLIGHT_WORDS = 24
+MAX_QUERY_TERMS = 16
+
+
+class SearchDocument(NamedTuple):
+    collection: str
+    table: str
+    columns: tuple
+
+
+# Collection names match the sync feed so hits can be rendered with the same dumps
+SEARCH_DOCUMENTS = (
+    SearchDocument("journal", "journal", ("content",)),
+    SearchDocument("obstacles", "obstacles", ("obstacle_text", "perception", "action", "will")),
+    SearchDocument("journey_milestones", "journey_milestones", ("title", "description")),
+    SearchDocument("premeditatio", "premeditatio_practices", ("scenario",)),
+)
+
+
+class SearchHit(NamedTuple):
+    collection: str
+    id: str
+    rank: float
+    highlight: str
+
+
+def query_terms(query: str) -> List[str]:
+    # Only word characters reach the engines, so user input can never be parsed as query syntax
+    return re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+
+
+def document_sql(document: SearchDocument, prefix: str = "") -> str:
+    return " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in document.columns)
+
+
+def tsvector_sql(document: SearchDocument) -> str:
+    # Must stay byte-for-byte identical to the indexed expression or Postgres won't use the GIN index
+    return f"to_tsvector('{SEARCH_LANGUAGE}', {document_sql(document)})"
+
+
+def create_search_index(connection):
+    if connection.dialect.name == "postgresql":
+        for document in SEARCH_DOCUMENTS:
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{document.table}_search ON {document.table} USING gin (({tsvector_sql(document)}))"))
+        return
+    # SQLite: one FTS5 table for all documents. search_rows maps each source row to a stable FTS rowid,
+    # so triggers update and delete by rowid instead of scanning the index
+    connection.execute(text("CREATE TABLE IF NOT EXISTS search_rows (docid INTEGER PRIMARY KEY, collection TEXT NOT NULL, row_id TEXT NOT NULL, UNIQUE (collection, row_id))"))
+    connection.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(body, user_id UNINDEXED, tokenize = 'porter unicode61')"))
+    for document in SEARCH_DOCUMENTS:
+        collection, table = document.collection, document.table
+        docid = f"(SELECT docid FROM search_rows WHERE collection = '{collection}' AND row_id = {{row}}.id)"
+        insert = f"INSERT INTO search_fts (rowid, body, user_id) VALUES ({docid.format(row='new')}, {document_sql(document, 'new.')}, new.user_id);"
+        delete = f"DELETE FROM search_fts WHERE rowid = {docid.format(row='old')};"
+        columns = ", ".join(document.columns + ("user_id",))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_rows (collection, row_id) VALUES ('{collection}', new.id); {insert} END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"{delete} DELETE FROM search_rows WHERE collection = '{collection}' AND row_id = old.id; END"
+        ))
+        connection.execute(text(
+            f"INSERT OR IGNORE INTO search_rows (collection, row_id) SELECT '{collection}', id FROM {table}"
+        ))
+        connection.execute(text(
+            f"INSERT INTO search_fts (rowid, body, user_id) SELECT r.docid, {document_sql(document, 't.')}, t.user_id "
+            f"FROM {table} t JOIN search_rows r ON r.collection = '{collection}' AND r.row_id = t.id "
+            f"WHERE r.docid NOT IN (SELECT rowid FROM search_fts)"
+        ))
+
+
+def search(db, user_id: str, query: str, documents: Sequence[SearchDocument], limit: int, offset: int) -> List[SearchHit]:
+    terms = query_terms(query)
+    if not terms or not documents:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgres(db, user_id, terms, documents, limit, offset)
+    return _search_sqlite(db, user_id, terms, documents, limit, offset)
+
+
+def _search_postgres(db, user_id, terms, documents, limit, offset) -> List[SearchHit]:
+    # All terms must match, the last one as a prefix so results follow the user while typing
+    tsquery = f"to_tsquery('{SEARCH_LANGUAGE}', :tsquery)"
+    selects = " UNION ALL ".join(
+        f"SELECT '{document.collection}' AS collection, id, ts_rank({tsvector_sql(document)}, {tsquery}) AS rank, "
+        f"{document_sql(document)} AS body FROM {document.table} "
+        f"WHERE user_id = :user_id AND {tsvector_sql(document)} @@ {tsquery}"
+        for document in documents
+    )
+    # Headlines are expensive, so only the rows on the requested page get one
+    rows = db.execute(text(
+        f"SELECT hits.collection, hits.id, hits.rank, ts_headline('{SEARCH_LANGUAGE}', hits.body, {tsquery}, :options) "
+        f"FROM ({selects} ORDER BY rank DESC, collection, id LIMIT :limit OFFSET :offset) AS hits "
+        f"ORDER BY hits.rank DESC, hits.collection, hits.id"
+    ), {
+        "user_id": user_id, "limit": limit, "offset": offset,
+        "tsquery": " & ".join(terms[:-1] + [terms[-1] + ":*"]),
+        "options": f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords={HIGHLIGHT_WORDS}, MinWords=8, MaxFragments=2",
+    })
+    return [SearchHit(collection, row_id, float(rank), highlight.strip()) for collection, row_id, rank, highlight in rows]
+
+
+def _search_sqlite(db, user_id, terms, documents, limit, offset) -> List[SearchHit]:
+    match = " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+    collections = {f"c{index}": document.collection for index, document in enumerate(documents)}
+    rows = db.execute(text(
+        f"SELECT r.collection, r.row_id, bm25(search_fts) AS rank, "
+        f"snippet(search_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', {HIGHLIGHT_WORDS}) "
+        f"FROM search_fts JOIN search_rows r ON r.docid = search_fts.rowid "
+        f"WHERE search_fts MATCH :match AND search_fts.user_id = :user_id AND r.collection IN ({', '.join(':' + key for key in collections)}) "
+        f"ORDER BY rank, r.collection, r.row_id LIMIT :limit OFFSET :offset"
+    ), {"match": match, "user_id": user_id, "limit": limit, "offset": offset, **collections})
+    # bm25() is lower-is-better; flip it so both backends rank higher scores first
+    return [SearchHit(collection, row_id, -float(rank), highlight.strip()) for collection, row_id, rank, highlight in rows]
+
+
+def resolve_documents(types: Optional[str]) -> List[SearchDocument]:
+    if not types:
+        return list(SEARCH_DOCUMENTS)
+    by_name = {document.collection: document for document in SEARCH_DOCUMENTS}
+    names = [name.strip() for name in types.split(",") if name.strip()]
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search collection: {unknown[0]}")
+    return [by_name[name] for name in names]
+
+
+def load_hits(db, user_id: str, hits: Sequence[SearchHit], sources: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ids: Dict[str, List[str]] = {}
+    for hit in hits:
+        ids.setdefault(hit.collection, []).append(hit.id)
+    items: Dict[tuple, Dict[str, Any]] = {}
+    for collection, row_ids in ids.items():
+        source = sources[collection]
+        rows = db.query(source.model).filter(source.model.user_id == user_id, source.model.id.in_(row_ids)).all()
+        for row, payload in zip(rows, source.dump(db, user_id, rows)):
+            items[(collection, row.id)] = payload
+    return [
+        {"collection": hit.collection, "id": hit.id, "rank": round(hit.rank, 6), "highlight": hit.highlight, "item": items[(hit.collection, hit.id)]}
+        for hit in hits if (hit.collection, hit.id) in items
+    ]
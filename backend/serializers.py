@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from operator import attrgetter
+from starlette.responses import JSONResponse, Response
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    # Encodes datetimes natively, so handlers can skip .isoformat() and FastAPI's jsonable_encoder pass
+    def render(self, content: Any) -> bytes:
+        return encode(content)
+
+
+def render(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    rendered = FastJSONResponse(content, status_code=status_code)
+    # Keep headers set on the injected Response (e.g. pagination cursors)
+    if response is not None:
+        rendered.raw_headers.extend(response.raw_headers)
+    return rendered
+
+
+class Schema:
+    def __init__(self, *fields: str, lists: Sequence[str] = ()):
+        self.fields = fields
+        self.lists = tuple(lists)
+        self._get = attrgetter(*fields)
+
+    def dump(self, obj, **extra) -> Dict[str, Any]:
+        data = dict(zip(self.fields, self._get(obj)))
+        for name in self.lists:
+            if data[name] is None:
+                data[name] = []
+        if extra:
+            data.update(extra)
+        return data
+
+    def dump_many(self, objs: Iterable) -> List[Dict[str, Any]]:
+        return [self.dump(obj) for obj in objs]
+
+
+GOAL = Schema("id", "user_id", "title", "description", "category", "principle", "why", "target_date", "milestones", "status", "progress", "created_at", "updated_at", lists=("milestones",))
+HABIT = Schema("id", "user_id", "name", "description", "frequency", "streak", "best_streak", "last_completed", "created_at")
+VISION_BOARD_ITEM = Schema("id", "user_id", "type", "content", "position", "created_at")
+JOURNAL_ENTRY = Schema("id", "user_id", "content", "mood", "gratitude", "date", "created_at", lists=("gratitude",))
+EXERCISE = Schema("id", "user_id", "exercise_type", "content", "completed", "date", "created_at")
+RITUAL_COMPLETION = Schema("id", "user_id", "ritual_type", "completed_at")
+WISDOM_FAVORITE = Schema("id", "user_id", "quote_id", "created_at")
+IDENTITY_STATEMENT = Schema("id", "user_id", "old_identity", "new_identity", "evidence_count", "strength_score", "created_at", "updated_at")
+IDENTITY_EVIDENCE = Schema("id", "user_id", "identity_id", "evidence_text", "date", "created_at")
+OBSTACLE = Schema("id", "user_id", "obstacle_text", "perception", "action", "will", "status", "transformed_at", "created_at", "updated_at")
+BURNING_DESIRE = Schema("id", "user_id", "desire_text", "why_text", "vision_text", "intensity", "created_at", "updated_at")
+DESIRE_VISUALIZATION = Schema("id", "user_id", "desire_id", "intensity_rating", "emotion", "notes", "date", "created_at")
+PREMEDITATIO_PRACTICE = Schema("id", "user_id", "scenario", "potential_obstacles", "planned_responses", "resilience_score", "actual_outcome", "lessons_learned", "date", "created_at", "updated_at", lists=("potential_obstacles", "planned_responses"))
+HABIT_CHAIN = Schema("id", "user_id", "name", "existing_habit", "new_habit", "chain_items", "success_count", "total_attempts", "chain_strength", "created_at", "updated_at", lists=("chain_items",))
+JOURNEY_MILESTONE = Schema("id", "user_id", "title", "description", "category", "emotion", "date", "created_at")
+LEGACY_STATEMENT = Schema("id", "user_id", "legacy_text", "values", "impact_areas", "future_self_letter", "mission_statement", "created_at", "updated_at", lists=("values", "impact_areas"))
+MORNING_ROUTINE = Schema("id", "user_id", "routine_name", "philosophy", "steps", "total_duration", "streak", "best_streak", "last_completed", "created_at", "updated_at", lists=("steps",))
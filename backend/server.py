@@ -1,22 +1,52 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from contextlib import asynccontextmanager
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, String, Integer, Boolean, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import create_engine, func, Column, String, Integer, Boolean, DateTime, Text, JSON, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import IntegrityError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import Callable, Iterable, List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
 import bcrypt
-import google.generativeai as genai
+import asyncio
+import functools
+import hashlib
 import json
+import time
+
+from async_db import to_async_url, bind_async_session, run_db
+from batch import BatchRegistry, BatchRequest
+from cache import TTLCache, RedisCache, ReadCache
+from coach import CoachProvider, GeminiProvider, build_prompt, resolve_mentor, response_cache_key
+from coach_sessions import SessionStore, MemorySessionStore, DatabaseSessionStore, trim_history
+from dialects import insert_for
+from hashing import HashingPool, PoolSaturated
+from metrics import PoolStats, Registry, HttpMetrics, CoachMetrics, MetricsMiddleware, instrumented_pool_class, pool_collector, stats_collector
+from migrations import run_migrations
+from profiler import QueryProfiler, ProfilerMiddleware, PROFILE_HEADER
+from quotes import QuoteCatalog
+from pagination import PageParams, page_params, paginate, keyset_columns, encode_offset, decode_offset, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from projections import parse_fields, column_query, project_rows
+from search import search, resolve_documents, load_hits
+from serializers import FastJSONResponse, render, GOAL, HABIT, VISION_BOARD_ITEM, JOURNAL_ENTRY, EXERCISE, RITUAL_COMPLETION, WISDOM_FAVORITE, IDENTITY_STATEMENT, IDENTITY_EVIDENCE, OBSTACLE, BURNING_DESIRE, DESIRE_VISUALIZATION, PREMEDITATIO_PRACTICE, HABIT_CHAIN, JOURNEY_MILESTONE, LEGACY_STATEMENT, MORNING_ROUTINE
+from sync import SyncSource, collect_changes, parse_watermark, record_deletes
+from streaks import StreakState, advance, replay, reset, live_streak, local_today
+from tokens import TokenClaims, TokenDenylist
+from versions import CollectionVersions, etag_matches
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -25,25 +55,164 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is required")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Schema changes are applied at deploy time by `python migrate.py`; AUTO_MIGRATE is for local runs and tests
+AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', '').lower() in ('1', 'true', 'yes')
+
+DB_ASYNC = os.environ.get('DB_ASYNC', '').lower() in ('1', 'true', 'yes')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+pool_stats = {'sync': PoolStats('sync')}
+metrics_registry = Registry()
+http_metrics = HttpMetrics(metrics_registry)
+coach_metrics = CoachMetrics(metrics_registry)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+HEALTH_DB_TIMEOUT = float(os.environ.get('HEALTH_DB_TIMEOUT', '2'))
+QUERY_PROFILE = os.environ.get('QUERY_PROFILE', '').lower() in ('1', 'true', 'yes')
+QUERY_PROFILE_REPEAT = int(os.environ.get('QUERY_PROFILE_REPEAT', '3'))
+QUERY_PROFILE_EXPLAIN = os.environ.get('QUERY_PROFILE_EXPLAIN', 'true').lower() in ('1', 'true', 'yes')
+query_profiler = QueryProfiler(repeat_threshold=QUERY_PROFILE_REPEAT, explain=QUERY_PROFILE_EXPLAIN) if QUERY_PROFILE else None
+
+
+def engine_options(database_url: str, pool_class, stats: PoolStats) -> Dict[str, Any]:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    # In-memory SQLite lives inside a single connection, so it keeps SQLAlchemy's default pool
+    if make_url(database_url).database not in (None, '', ':memory:'):
+        options.update(
+            poolclass=instrumented_pool_class(pool_class, stats),
+            pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
+async_engine = None
+AsyncSessionLocal = None
+
+
+def init_db(database_url: Optional[str] = None):
+    # Builds the engines and binds the session factories; no connection is opened until the first query
+    global DATABASE_URL, engine, async_engine, AsyncSessionLocal
+    DATABASE_URL = database_url or DATABASE_URL
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL environment variable is required")
+    engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, QueuePool, pool_stats['sync']))
+    pool_stats['sync'].attach(engine, capacity=DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    http_metrics.instrument_engine(engine, 'sync')
+    if query_profiler:
+        query_profiler.attach(engine, 'sync')
+    SessionLocal.configure(bind=engine)
+    if DB_ASYNC:
+        # Needs an async driver (asyncpg / aiosqlite) and greenlet, so only imported when enabled
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        async_url, async_connect_args = to_async_url(DATABASE_URL)
+        pool_stats['async'] = PoolStats('async')
+        async_engine = create_async_engine(async_url, connect_args=async_connect_args, **engine_options(DATABASE_URL, AsyncAdaptedQueuePool, pool_stats['async']))
+        pool_stats['async'].attach(async_engine.sync_engine, capacity=DB_POOL_SIZE + DB_MAX_OVERFLOW)
+        http_metrics.instrument_engine(async_engine.sync_engine, 'async')
+        if query_profiler:
+            query_profiler.attach(async_engine.sync_engine, 'async', async_engine=async_engine)
+        AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False)
+    return engine
+
+
+def dispose_engines_after_fork():
+    # A forked worker must never reuse connections pooled by the parent (e.g. a preloading master);
+    # close=False drops the references without closing sockets the parent still owns
+    if engine is not None:
+        engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=dispose_engines_after_fork)
+
+
+def migrate():
+    if engine is None:
+        init_db()
+    run_migrations(engine, Base.metadata)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if engine is None:
+        init_db()
+    if AUTO_MIGRATE:
+        await run_in_threadpool(migrate)
+    revocations = asyncio.create_task(refresh_revocations())
+    try:
+        yield
+    finally:
+        revocations.cancel()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class SessionRoute(APIRoute):
+    # With DB_ASYNC on, handlers taking `db` are served as coroutines on an AsyncSession
+    def __init__(self, path: str, endpoint, **kwargs):
+        if DB_ASYNC:
+            endpoint = bind_async_session(endpoint, get_async_db)
+        super().__init__(path, endpoint, **kwargs)
 
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
+api_router = APIRouter(prefix="/api", route_class=SessionRoute)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_DAYS = 30
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+HASH_POOL_WORKERS = int(os.environ.get('HASH_POOL_WORKERS', str(min(4, os.cpu_count() or 1))))
+HASH_POOL_QUEUE = int(os.environ.get('HASH_POOL_QUEUE', '32'))
+hashing_pool = HashingPool(workers=HASH_POOL_WORKERS, max_pending=HASH_POOL_QUEUE)
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', '10000'))
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', '300'))
+TOKEN_REVOCATION_REFRESH = float(os.environ.get('TOKEN_REVOCATION_REFRESH', '30'))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+token_denylist = TokenDenylist(refresh_interval=TOKEN_REVOCATION_REFRESH)
 
 GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY', '')
+COACH_CACHE_SIZE = int(os.environ.get('COACH_CACHE_SIZE', '1024'))
+COACH_CACHE_TTL = float(os.environ.get('COACH_CACHE_TTL', '3600'))
+coach_cache = TTLCache(maxsize=COACH_CACHE_SIZE, ttl=COACH_CACHE_TTL)
+COACH_SESSION_BACKEND = os.environ.get('COACH_SESSION_BACKEND', 'memory')
+COACH_SESSION_MAX_TOKENS = int(os.environ.get('COACH_SESSION_MAX_TOKENS', '2000'))
+COACH_SESSION_SIZE = int(os.environ.get('COACH_SESSION_SIZE', '10000'))
+COACH_SESSION_TTL = float(os.environ.get('COACH_SESSION_TTL', '86400'))
+SYNC_WATERMARK_LAG = float(os.environ.get('SYNC_WATERMARK_LAG', '5'))
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', '20'))
+# Rows per collection in one /api/sync response
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', '200'))
+READ_CACHE_BACKEND = os.environ.get('READ_CACHE_BACKEND', 'memory')
+READ_CACHE_URL = os.environ.get('READ_CACHE_URL', '')
+READ_CACHE_BYTES = int(os.environ.get('READ_CACHE_BYTES', str(64 * 1024 * 1024)))
+READ_CACHE_TTL = float(os.environ.get('READ_CACHE_TTL', '60'))
+read_cache = None
+if READ_CACHE_BACKEND == 'redis':
+    read_cache = ReadCache(RedisCache(READ_CACHE_URL), ttl=READ_CACHE_TTL)
+elif READ_CACHE_BACKEND == 'memory':
+    read_cache = ReadCache(TTLCache(maxsize=1_000_000, ttl=READ_CACHE_TTL, maxbytes=READ_CACHE_BYTES), ttl=READ_CACHE_TTL)
+quote_catalog = QuoteCatalog.load(ROOT_DIR / 'data' / 'quotes.json')
+coach_provider = None
 if GOOGLE_API_KEY:
+    # The Gemini SDK is slow to import, so it is only loaded when a key is configured
+    import google.generativeai as genai
     genai.configure(api_key=GOOGLE_API_KEY)
+    coach_provider = GeminiProvider()
+    coach_provider.on_usage = coach_metrics.record_usage
 
 
 class UserDB(Base):
@@ -57,6 +226,7 @@ class UserDB(Base):
 
 class GoalDB(Base):
     __tablename__ = "goals"
+    __table_args__ = (Index('ix_goals_user_created', 'user_id', 'created_at'), Index('ix_goals_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     title = Column(String, nullable=False)
@@ -69,10 +239,11 @@ class GoalDB(Base):
     status = Column(String, default="active")
     progress = Column(Integer, default=0)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class HabitDB(Base):
     __tablename__ = "habits"
+    __table_args__ = (Index('ix_habits_user_created', 'user_id', 'created_at'), Index('ix_habits_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     name = Column(String, nullable=False)
@@ -81,20 +252,34 @@ class HabitDB(Base):
     streak = Column(Integer, default=0)
     best_streak = Column(Integer, default=0)
     last_completed = Column(String, nullable=True)
+    # Legacy: completions now live in habit_completions (backfilled by migration 2)
     completion_dates = Column(JSON, default=list)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+class HabitCompletionDB(Base):
+    __tablename__ = "habit_completions"
+    __table_args__ = (UniqueConstraint('habit_id', 'date', name='uq_habit_completions_habit_date'), Index('ix_habit_completions_user_date', 'user_id', 'date'))
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    habit_id = Column(String, nullable=False)
+    user_id = Column(String, nullable=False)
+    date = Column(String, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
 class VisionBoardItemDB(Base):
     __tablename__ = "vision_board"
+    __table_args__ = (Index('ix_vision_board_user_created', 'user_id', 'created_at'), Index('ix_vision_board_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     type = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     position = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class JournalEntryDB(Base):
     __tablename__ = "journal"
+    __table_args__ = (Index('ix_journal_user_date', 'user_id', 'date'), Index('ix_journal_user_created', 'user_id', 'created_at'), Index('ix_journal_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     content = Column(Text, nullable=False)
@@ -102,9 +287,11 @@ class JournalEntryDB(Base):
     gratitude = Column(JSON, default=list)
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class ExerciseDB(Base):
     __tablename__ = "exercises"
+    __table_args__ = (Index('ix_exercises_user_date', 'user_id', 'date'), Index('ix_exercises_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     exercise_type = Column(String, nullable=False)
@@ -112,23 +299,29 @@ class ExerciseDB(Base):
     completed = Column(Boolean, default=False)
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class RitualCompletionDB(Base):
     __tablename__ = "ritual_completions"
+    __table_args__ = (Index('ix_ritual_completions_user_completed', 'user_id', 'completed_at'), Index('ix_ritual_completions_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     ritual_type = Column(String, nullable=False)
     completed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class WisdomFavoriteDB(Base):
     __tablename__ = "wisdom_favorites"
+    __table_args__ = (Index('uq_wisdom_favorites_user_quote', 'user_id', 'quote_id', unique=True), Index('ix_wisdom_favorites_user_created', 'user_id', 'created_at'), Index('ix_wisdom_favorites_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     quote_id = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class IdentityStatementDB(Base):
     __tablename__ = "identity_statements"
+    __table_args__ = (Index('ix_identity_statements_user_created', 'user_id', 'created_at'), Index('ix_identity_statements_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     old_identity = Column(Text, nullable=False)
@@ -136,19 +329,22 @@ class IdentityStatementDB(Base):
     evidence_count = Column(Integer, default=0)
     strength_score = Column(Integer, default=0)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class IdentityEvidenceDB(Base):
     __tablename__ = "identity_evidence"
+    __table_args__ = (Index('ix_identity_evidence_user_identity', 'user_id', 'identity_id', 'created_at'), Index('ix_identity_evidence_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     identity_id = Column(String, nullable=False)
     evidence_text = Column(Text, nullable=False)
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class ObstacleDB(Base):
     __tablename__ = "obstacles"
+    __table_args__ = (Index('ix_obstacles_user_created', 'user_id', 'created_at'), Index('ix_obstacles_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     obstacle_text = Column(Text, nullable=False)
@@ -158,10 +354,11 @@ class ObstacleDB(Base):
     status = Column(String, default="active")
     transformed_at = Column(String, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class BurningDesireDB(Base):
     __tablename__ = "burning_desires"
+    __table_args__ = (Index('ix_burning_desires_user_updated', 'user_id', 'updated_at'),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, unique=True, nullable=False)
     desire_text = Column(Text, nullable=False)
@@ -169,10 +366,11 @@ class BurningDesireDB(Base):
     vision_text = Column(Text, nullable=False)
     intensity = Column(Integer, default=10)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class DesireVisualizationDB(Base):
     __tablename__ = "desire_visualizations"
+    __table_args__ = (Index('ix_desire_visualizations_user_created', 'user_id', 'created_at'), Index('ix_desire_visualizations_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     desire_id = Column(String, nullable=False)
@@ -181,9 +379,11 @@ class DesireVisualizationDB(Base):
     notes = Column(Text, nullable=True)
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class PremeditatioPracticeDB(Base):
     __tablename__ = "premeditatio_practices"
+    __table_args__ = (Index('ix_premeditatio_practices_user_created', 'user_id', 'created_at'), Index('ix_premeditatio_practices_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     scenario = Column(Text, nullable=False)
@@ -194,10 +394,11 @@ class PremeditatioPracticeDB(Base):
     lessons_learned = Column(Text, nullable=True)
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class HabitChainDB(Base):
     __tablename__ = "habit_chains"
+    __table_args__ = (Index('ix_habit_chains_user_created', 'user_id', 'created_at'), Index('ix_habit_chains_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     name = Column(String, nullable=False)
@@ -208,10 +409,11 @@ class HabitChainDB(Base):
     total_attempts = Column(Integer, default=0)
     chain_strength = Column(Integer, default=0)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class HabitChainCompletionDB(Base):
     __tablename__ = "habit_chain_completions"
+    __table_args__ = (Index('ix_habit_chain_completions_user_chain', 'user_id', 'chain_id', 'date'),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     chain_id = Column(String, nullable=False)
@@ -221,6 +423,7 @@ class HabitChainCompletionDB(Base):
 
 class JourneyMilestoneDB(Base):
     __tablename__ = "journey_milestones"
+    __table_args__ = (Index('ix_journey_milestones_user_date', 'user_id', 'date'), Index('ix_journey_milestones_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     title = Column(String, nullable=False)
@@ -229,9 +432,11 @@ class JourneyMilestoneDB(Base):
     emotion = Column(String, nullable=True)
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class LegacyStatementDB(Base):
     __tablename__ = "legacy_statements"
+    __table_args__ = (Index('ix_legacy_statements_user_updated', 'user_id', 'updated_at'),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, unique=True, nullable=False)
     legacy_text = Column(Text, nullable=False)
@@ -240,10 +445,11 @@ class LegacyStatementDB(Base):
     future_self_letter = Column(Text, nullable=True)
     mission_statement = Column(Text, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class MorningRoutineDB(Base):
     __tablename__ = "morning_routines"
+    __table_args__ = (Index('ix_morning_routines_user_created', 'user_id', 'created_at'), Index('ix_morning_routines_user_updated', 'user_id', 'updated_at'))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     routine_name = Column(String, nullable=False)
@@ -254,10 +460,11 @@ class MorningRoutineDB(Base):
     best_streak = Column(Integer, default=0)
     last_completed = Column(String, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 class MorningRoutineCompletionDB(Base):
     __tablename__ = "morning_routine_completions"
+    __table_args__ = (Index('ix_morning_routine_completions_user_routine', 'user_id', 'routine_id', 'date'),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     routine_id = Column(String, nullable=False)
@@ -265,7 +472,69 @@ class MorningRoutineCompletionDB(Base):
     date = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-Base.metadata.create_all(bind=engine)
+class RevokedTokenDB(Base):
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (Index('ix_revoked_tokens_created', 'created_at'),)
+    jti = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class CoachSessionDB(Base):
+    __tablename__ = "coach_sessions"
+    __table_args__ = (Index('ix_coach_sessions_user_updated', 'user_id', 'updated_at'),)
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    mentor = Column(String, nullable=True)
+    history = Column(JSON, default=list)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class StreakDB(Base):
+    __tablename__ = "streaks"
+    __table_args__ = (UniqueConstraint('user_id', 'entity_type', 'entity_id', name='uq_streaks_user_entity'),)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, nullable=False)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(String, nullable=False)
+    current_streak = Column(Integer, default=0)
+    best_streak = Column(Integer, default=0)
+    last_date = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class IdempotencyKeyDB(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    operation = Column(String, nullable=False)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class TombstoneDB(Base):
+    __tablename__ = "tombstones"
+    __table_args__ = (Index('ix_tombstones_user_deleted', 'user_id', 'deleted_at'),)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, nullable=False)
+    collection = Column(String, nullable=False)
+    row_id = Column(String, nullable=False)
+    deleted_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class CollectionVersionDB(Base):
+    __tablename__ = "collection_versions"
+    user_id = Column(String, primary_key=True)
+    collection = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+if DATABASE_URL:
+    init_db()
+
+if COACH_SESSION_BACKEND == 'database':
+    coach_sessions: SessionStore = DatabaseSessionStore(SessionLocal, CoachSessionDB)
+else:
+    coach_sessions = MemorySessionStore(maxsize=COACH_SESSION_SIZE, ttl=COACH_SESSION_TTL)
 
 
 def get_db():
@@ -276,6 +545,33 @@ def get_db():
         db.close()
 
 
+def cached_read(*collections: str, conditional: bool = True, vary: tuple = ()):
+    # Conditional GET first (304 on a matching ETag), then the shared read cache, then the handler itself
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(**kwargs):
+            db, user_id, request, response = kwargs['db'], kwargs['user_id'], kwargs['request'], kwargs['response']
+            variant = "|".join([request.url.path, str(request.query_params)] + [str(kwargs[name]) for name in vary])
+            if conditional:
+                versions = collection_versions.conditional(db, user_id, collections, request, response, variant)
+            elif read_cache is not None:
+                versions = {collection: version for collection, (version, _) in collection_versions.versions(db, user_id, collections).items()}
+            if read_cache is None:
+                return endpoint(**kwargs)
+            key = read_cache.key(user_id, versions, variant)
+            body = read_cache.get(key)
+            if body is not None:
+                cached = Response(body, media_type="application/json")
+                cached.raw_headers.extend(response.raw_headers)
+                return cached
+            result = endpoint(**kwargs)
+            if isinstance(result, Response) and result.status_code == 200:
+                read_cache.set(key, bytes(result.body))
+            return result
+        return wrapper
+    return decorator
+
+
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
@@ -332,6 +628,7 @@ class ExerciseCreate(BaseModel):
 class AICoachRequest(BaseModel):
     message: str
     context: Optional[Dict[str, Any]] = None
+    use_cache: bool = True
 
 class RitualCompleteRequest(BaseModel):
     ritual_type: str
@@ -416,11 +713,18 @@ class MorningRoutineCompletion(BaseModel):
     routine_id: str
     completed_steps: List[str] = []
 
+class HabitCompleteOperation(BaseModel):
+    habit_id: str
+    day: Optional[date] = Field(None, alias="date")
+
+class JournalEntryOperation(JournalEntryCreate):
+    day: Optional[date] = Field(None, alias="date")
+
 
 def hash_password(password: str) -> str:
     # Use bcrypt directly with 72-byte limit handled properly
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -429,28 +733,135 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_bytes = hashed_password.encode('utf-8') if isinstance(hashed_password, str) else hashed_password
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt+digest>
+    try:
+        return int(hashed_password.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def run_password_hashing(fn, *args):
+    try:
+        return await hashing_pool.run(fn, *args)
+    except PoolSaturated:
+        raise HTTPException(status_code=503, detail="Authentication is busy, please retry", headers={"Retry-After": "1"})
+
+def get_completion_dates(db: Session, user_id: str, habit_ids: List[str]) -> Dict[str, List[str]]:
+    dates = {habit_id: [] for habit_id in habit_ids}
+    if not habit_ids:
+        return dates
+    rows = db.query(HabitCompletionDB.habit_id, HabitCompletionDB.date).filter(
+        HabitCompletionDB.user_id == user_id, HabitCompletionDB.habit_id.in_(habit_ids)
+    ).order_by(HabitCompletionDB.date).all()
+    for habit_id, date in rows:
+        dates[habit_id].append(date)
+    return dates
+
+async def get_today(x_timezone: Optional[str] = Header(None)) -> date:
+    return local_today(x_timezone)
+
+def record_streak(db: Session, user_id: str, entity_type: str, entity_id: str, day: date, success: bool = True,
+                  history: Optional[Callable[[], Iterable[date]]] = None) -> StreakState:
+    db.execute(
+        insert_for(db.get_bind(), StreakDB)
+        .values(id=str(uuid.uuid4()), user_id=user_id, entity_type=entity_type, entity_id=entity_id, current_streak=0, best_streak=0)
+        .on_conflict_do_nothing(index_elements=['user_id', 'entity_type', 'entity_id'])
+    )
+    row = db.query(StreakDB).filter(
+        StreakDB.user_id == user_id, StreakDB.entity_type == entity_type, StreakDB.entity_id == entity_id
+    ).with_for_update().one()
+    state = StreakState.from_columns(row.current_streak, row.best_streak, row.last_date)
+    if success and history is not None and state.last_date is not None and day < state.last_date:
+        # A late event (e.g. replayed from an offline batch) can bridge a gap, so rebuild from history
+        rebuilt = replay([*history(), day])
+        state = StreakState(rebuilt.current, max(state.best, rebuilt.best), rebuilt.last_date)
+    else:
+        state = advance(state, day) if success else reset(state, day)
+    row.current_streak = state.current
+    row.best_streak = state.best
+    row.last_date = state.last_date.isoformat() if state.last_date else None
+    row.updated_at = datetime.now(timezone.utc)
+    return state
+
 def create_token(user_id: str) -> str:
     expiration = datetime.now(timezone.utc) + timedelta(days=JWT_EXPIRATION_DAYS)
-    return jwt.encode({"user_id": user_id, "exp": expiration}, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode({"user_id": user_id, "exp": expiration, "jti": str(uuid.uuid4())}, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+def decode_token(token: str) -> TokenClaims:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    # Tokens issued before jti was added are revoked by their digest
+    jti = payload.get("jti") or hashlib.sha256(token.encode('utf-8')).hexdigest()
+    return TokenClaims(user_id, jti, float(payload["exp"]))
+
+def load_revocations():
+    since = token_denylist.synced_until
+    synced_until = time.time()
+    with SessionLocal() as db:
+        query = db.query(RevokedTokenDB.jti, RevokedTokenDB.expires_at).filter(RevokedTokenDB.expires_at > datetime.now(timezone.utc))
+        if since is not None:
+            query = query.filter(RevokedTokenDB.created_at >= datetime.fromtimestamp(since, timezone.utc) - timedelta(seconds=5))
+        rows = [(jti, expires_at.replace(tzinfo=timezone.utc).timestamp()) for jti, expires_at in query.all()]
+    token_denylist.merge(rows, synced_until)
+
+async def refresh_revocations():
+    # Keeps the revocation query off the request path
+    while True:
+        try:
+            await run_in_threadpool(load_revocations)
+        except Exception as e:
+            logger.warning(f"Token revocation refresh failed: {e}")
+        await asyncio.sleep(TOKEN_REVOCATION_REFRESH)
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenClaims:
+    token = credentials.credentials
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.set(token, claims, ttl=min(TOKEN_CACHE_TTL, claims.exp - time.time()))
+    elif claims.exp <= time.time():
+        raise HTTPException(status_code=401, detail="Token expired")
+    
+    # The lifespan task normally keeps the denylist fresh; this only fires when it is not running or has stalled
+    if token_denylist.claim_refresh():
+        await run_in_threadpool(load_revocations)
+    if token_denylist.is_revoked(claims.jti):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return claims
+
+async def get_current_user(claims: TokenClaims = Depends(get_token_claims)) -> str:
+    return claims.user_id
 
 
+def find_user_credentials(db: Session, email: str):
+    row = db.query(UserDB.id, UserDB.email, UserDB.name, UserDB.password_hash).filter(UserDB.email == email).first()
+    # Release the connection before the slow password check
+    db.rollback()
+    return row
+
+def insert_user(db: Session, user: UserDB) -> bool:
+    db.add(user)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+def update_password_hash(db: Session, user_id: str, password_hash: str):
+    db.query(UserDB).filter(UserDB.id == user_id).update({UserDB.password_hash: password_hash}, synchronize_session=False)
+    db.commit()
+
 @api_router.post("/auth/register")
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(UserDB).filter(UserDB.email == user_data.email).first()
-    if existing:
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    if await run_db(db, find_user_credentials, user_data.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_id = str(uuid.uuid4())
@@ -458,24 +869,44 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         id=user_id,
         email=user_data.email,
         name=user_data.name,
-        password_hash=hash_password(user_data.password)
+        password_hash=await run_password_hashing(hash_password, user_data.password)
     )
-    db.add(user)
-    db.commit()
+    if not await run_db(db, insert_user, user):
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     token = create_token(user_id)
     return {"token": token, "user": {"id": user_id, "email": user_data.email, "name": user_data.name}}
 
 @api_router.post("/auth/login")
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(UserDB).filter(UserDB.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_db(db, find_user_credentials, credentials.email)
+    if not user or not await run_password_hashing(verify_password, credentials.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    if password_needs_rehash(user.password_hash):
+        try:
+            new_hash = await hashing_pool.run(hash_password, credentials.password)
+            await run_db(db, update_password_hash, user.id, new_hash)
+        except PoolSaturated:
+            pass
+    
     token = create_token(user.id)
     return {"token": token, "user": {"id": user.id, "email": user.email, "name": user.name}}
 
 
+@api_router.post("/auth/logout")
+def logout(claims: TokenClaims = Depends(get_token_claims), credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    db.execute(
+        insert_for(db.get_bind(), RevokedTokenDB)
+        .values(jti=claims.jti, user_id=claims.user_id, expires_at=datetime.fromtimestamp(claims.exp, timezone.utc), created_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=['jti'])
+    )
+    db.commit()
+    token_denylist.add(claims.jti, claims.exp)
+    token_cache.delete(credentials.credentials)
+    return {"message": "Logged out"}
+
+
 @api_router.post("/goals")
 def create_goal(goal_data: GoalCreate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     milestones = goal_data.milestones or []
@@ -501,28 +932,18 @@ def create_goal(goal_data: GoalCreate, user_id: str = Depends(get_current_user),
     db.commit()
     db.refresh(goal)
     
-    return {
-        "id": goal.id, "user_id": goal.user_id, "title": goal.title,
-        "description": goal.description, "category": goal.category,
-        "principle": goal.principle, "why": goal.why,
-        "target_date": goal.target_date, "milestones": goal.milestones,
-        "status": goal.status, "progress": goal.progress,
-        "created_at": goal.created_at.isoformat(),
-        "updated_at": goal.updated_at.isoformat()
-    }
+    return render(GOAL.dump(goal))
+
+GOAL_FIELDS = GOAL.fields
 
 @api_router.get("/goals")
-def get_goals(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("goals")
+def get_goals(request: Request, response: Response, fields: Optional[str] = Query(None), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = parse_fields(fields, GOAL_FIELDS)
+    if selected:
+        return render(project_rows(GoalDB, column_query(db, GoalDB, selected).filter(GoalDB.user_id == user_id).all(), selected), response)
     goals = db.query(GoalDB).filter(GoalDB.user_id == user_id).all()
-    return [{
-        "id": g.id, "user_id": g.user_id, "title": g.title,
-        "description": g.description, "category": g.category,
-        "principle": g.principle, "why": g.why,
-        "target_date": g.target_date, "milestones": g.milestones or [],
-        "status": g.status, "progress": g.progress,
-        "created_at": g.created_at.isoformat() if g.created_at else None,
-        "updated_at": g.updated_at.isoformat() if g.updated_at else None
-    } for g in goals]
+    return render(GOAL.dump_many(goals), response)
 
 @api_router.put("/goals/{goal_id}")
 def update_goal(goal_id: str, goal_update: GoalUpdate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -547,15 +968,7 @@ def update_goal(goal_id: str, goal_update: GoalUpdate, user_id: str = Depends(ge
     db.commit()
     db.refresh(goal)
     
-    return {
-        "id": goal.id, "user_id": goal.user_id, "title": goal.title,
-        "description": goal.description, "category": goal.category,
-        "principle": goal.principle, "why": goal.why,
-        "target_date": goal.target_date, "milestones": goal.milestones or [],
-        "status": goal.status, "progress": goal.progress,
-        "created_at": goal.created_at.isoformat(),
-        "updated_at": goal.updated_at.isoformat()
-    }
+    return render(GOAL.dump(goal))
 
 @api_router.delete("/goals/{goal_id}")
 def delete_goal(goal_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -579,57 +992,64 @@ def create_habit(habit_data: HabitCreate, user_id: str = Depends(get_current_use
     db.commit()
     db.refresh(habit)
     
-    return {
-        "id": habit.id, "user_id": habit.user_id, "name": habit.name,
-        "description": habit.description, "frequency": habit.frequency,
-        "streak": habit.streak, "best_streak": habit.best_streak,
-        "last_completed": habit.last_completed,
-        "completion_dates": habit.completion_dates or [],
-        "created_at": habit.created_at.isoformat()
-    }
+    return render(HABIT.dump(habit, completion_dates=[]))
+
+HABIT_FIELDS = HABIT.fields + ("completion_dates",)
 
 @api_router.get("/habits")
-def get_habits(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("habits")
+def get_habits(request: Request, response: Response, fields: Optional[str] = Query(None), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = parse_fields(fields, HABIT_FIELDS)
+    if selected:
+        # completion_dates comes from habit_completions, not the legacy column of the same name
+        columns = [f for f in selected if f != "completion_dates"]
+        rows = column_query(db, HabitDB, columns).filter(HabitDB.user_id == user_id).all()
+        items = project_rows(HabitDB, rows, columns)
+        if "completion_dates" in selected:
+            completion_dates = get_completion_dates(db, user_id, [r.id for r in rows])
+            for row, item in zip(rows, items):
+                item["completion_dates"] = completion_dates[row.id]
+        return render(items, response)
     habits = db.query(HabitDB).filter(HabitDB.user_id == user_id).all()
-    return [{
-        "id": h.id, "user_id": h.user_id, "name": h.name,
-        "description": h.description, "frequency": h.frequency,
-        "streak": h.streak, "best_streak": h.best_streak,
-        "last_completed": h.last_completed,
-        "completion_dates": h.completion_dates or [],
-        "created_at": h.created_at.isoformat() if h.created_at else None
-    } for h in habits]
+    completion_dates = get_completion_dates(db, user_id, [h.id for h in habits])
+    return render([HABIT.dump(h, completion_dates=completion_dates[h.id]) for h in habits], response)
 
-@api_router.post("/habits/{habit_id}/complete")
-def complete_habit(habit_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def apply_habit_completion(db: Session, user_id: str, habit_id: str, today: date) -> Dict[str, Any]:
     habit = db.query(HabitDB).filter(HabitDB.id == habit_id, HabitDB.user_id == user_id).first()
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
     
-    today = datetime.now(timezone.utc).date().isoformat()
-    completion_dates = list(habit.completion_dates or [])
     streak = habit.streak
     
-    if today not in completion_dates:
-        completion_dates.append(today)
-        sorted_dates = sorted(completion_dates, reverse=True)
-        streak = 1
-        for i in range(len(sorted_dates) - 1):
-            current = datetime.fromisoformat(sorted_dates[i]).date()
-            previous = datetime.fromisoformat(sorted_dates[i + 1]).date()
-            if (current - previous).days == 1:
-                streak += 1
-            else:
-                break
-        
-        habit.completion_dates = completion_dates
-        habit.last_completed = today
-        habit.streak = streak
-        habit.best_streak = max(habit.best_streak, streak)
-        db.commit()
+    inserted = db.execute(
+        insert_for(db.get_bind(), HabitCompletionDB)
+        .values(id=str(uuid.uuid4()), habit_id=habit.id, user_id=user_id, date=today.isoformat(), created_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=['habit_id', 'date'])
+    ).rowcount
+    
+    if inserted:
+        state = StreakState.from_columns(habit.streak, habit.best_streak, habit.last_completed)
+        if state.last_date is not None and today < state.last_date:
+            # A late completion (e.g. replayed from an offline batch) can bridge a gap, so rebuild from history
+            rebuilt = replay(date.fromisoformat(d) for d in get_completion_dates(db, user_id, [habit.id])[habit.id])
+            state = StreakState(rebuilt.current, max(state.best, rebuilt.best), rebuilt.last_date)
+        else:
+            state = advance(state, today)
+        streak = state.current
+        # completion_dates changed even if the streak did not, so sync and ETags must see the habit as updated
+        habit.updated_at = datetime.now(timezone.utc)
+        habit.last_completed = state.last_date.isoformat()
+        habit.streak = state.current
+        habit.best_streak = state.best
     
     return {"message": "Habit completed", "streak": streak}
 
+@api_router.post("/habits/{habit_id}/complete")
+def complete_habit(habit_id: str, user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
+    result = apply_habit_completion(db, user_id, habit_id, today)
+    db.commit()
+    return result
+
 @api_router.put("/habits/{habit_id}")
 def update_habit(habit_id: str, habit_update: HabitUpdate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     habit = db.query(HabitDB).filter(HabitDB.id == habit_id, HabitDB.user_id == user_id).first()
@@ -642,21 +1062,16 @@ def update_habit(habit_id: str, habit_update: HabitUpdate, user_id: str = Depend
             setattr(habit, key, value)
     db.commit()
     db.refresh(habit)
+    completion_dates = get_completion_dates(db, user_id, [habit.id])
     
-    return {
-        "id": habit.id, "user_id": habit.user_id, "name": habit.name,
-        "description": habit.description, "frequency": habit.frequency,
-        "streak": habit.streak, "best_streak": habit.best_streak,
-        "last_completed": habit.last_completed,
-        "completion_dates": habit.completion_dates or [],
-        "created_at": habit.created_at.isoformat()
-    }
+    return render(HABIT.dump(habit, completion_dates=completion_dates[habit.id]))
 
 @api_router.delete("/habits/{habit_id}")
 def delete_habit(habit_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     habit = db.query(HabitDB).filter(HabitDB.id == habit_id, HabitDB.user_id == user_id).first()
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
+    db.query(HabitCompletionDB).filter(HabitCompletionDB.habit_id == habit.id).delete(synchronize_session=False)
     db.delete(habit)
     db.commit()
     return {"message": "Habit deleted"}
@@ -674,20 +1089,13 @@ def create_vision_item(item_data: VisionBoardItemCreate, user_id: str = Depends(
     db.commit()
     db.refresh(item)
     
-    return {
-        "id": item.id, "user_id": item.user_id, "type": item.type,
-        "content": item.content, "position": item.position,
-        "created_at": item.created_at.isoformat()
-    }
+    return render(VISION_BOARD_ITEM.dump(item))
 
 @api_router.get("/vision-board")
-def get_vision_board(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("vision_board")
+def get_vision_board(request: Request, response: Response, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     items = db.query(VisionBoardItemDB).filter(VisionBoardItemDB.user_id == user_id).all()
-    return [{
-        "id": i.id, "user_id": i.user_id, "type": i.type,
-        "content": i.content, "position": i.position,
-        "created_at": i.created_at.isoformat() if i.created_at else None
-    } for i in items]
+    return render(VISION_BOARD_ITEM.dump_many(items), response)
 
 @api_router.delete("/vision-board/{item_id}")
 def delete_vision_item(item_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -699,33 +1107,42 @@ def delete_vision_item(item_id: str, user_id: str = Depends(get_current_user), d
     return {"message": "Item deleted"}
 
 
-@api_router.post("/journal")
-def create_journal_entry(entry_data: JournalEntryCreate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_journal_dates(db: Session, user_id: str) -> List[date]:
+    rows = db.query(JournalEntryDB.date).filter(JournalEntryDB.user_id == user_id).distinct().all()
+    return [date.fromisoformat(day[:10]) for (day,) in rows]
+
+def add_journal_entry(db: Session, user_id: str, entry_data: JournalEntryCreate, today: date) -> JournalEntryDB:
     entry_id = str(uuid.uuid4())
     entry = JournalEntryDB(
         id=entry_id, user_id=user_id,
         content=entry_data.content, mood=entry_data.mood,
         gratitude=entry_data.gratitude or [],
-        date=datetime.now(timezone.utc).date().isoformat()
+        date=today.isoformat()
     )
     db.add(entry)
+    record_streak(db, user_id, 'journal', user_id, today, history=lambda: get_journal_dates(db, user_id))
+    return entry
+
+@api_router.post("/journal")
+def create_journal_entry(entry_data: JournalEntryCreate, user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
+    entry = add_journal_entry(db, user_id, entry_data, today)
     db.commit()
     db.refresh(entry)
     
-    return {
-        "id": entry.id, "user_id": entry.user_id, "content": entry.content,
-        "mood": entry.mood, "gratitude": entry.gratitude or [],
-        "date": entry.date, "created_at": entry.created_at.isoformat()
-    }
+    return render(JOURNAL_ENTRY.dump(entry))
+
+JOURNAL_FIELDS = JOURNAL_ENTRY.fields
+JOURNAL_ORDER = (JournalEntryDB.date, JournalEntryDB.created_at)
 
 @api_router.get("/journal")
-def get_journal_entries(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    entries = db.query(JournalEntryDB).filter(JournalEntryDB.user_id == user_id).order_by(JournalEntryDB.date.desc()).all()
-    return [{
-        "id": e.id, "user_id": e.user_id, "content": e.content,
-        "mood": e.mood, "gratitude": e.gratitude or [],
-        "date": e.date, "created_at": e.created_at.isoformat() if e.created_at else None
-    } for e in entries]
+def get_journal_entries(response: Response, page: PageParams = Depends(page_params), fields: Optional[str] = Query(None), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = parse_fields(fields, JOURNAL_FIELDS)
+    if selected:
+        keys = [column.key for column in keyset_columns(JOURNAL_ORDER, JournalEntryDB.id)]
+        query = column_query(db, JournalEntryDB, selected, keys=keys).filter(JournalEntryDB.user_id == user_id)
+        return render(project_rows(JournalEntryDB, paginate(query, JOURNAL_ORDER, JournalEntryDB.id, page, response), selected), response)
+    entries = paginate(db.query(JournalEntryDB).filter(JournalEntryDB.user_id == user_id), JOURNAL_ORDER, JournalEntryDB.id, page, response)
+    return render(JOURNAL_ENTRY.dump_many(entries), response)
 
 
 @api_router.post("/exercises")
@@ -741,152 +1158,153 @@ def create_exercise(exercise_data: ExerciseCreate, user_id: str = Depends(get_cu
     db.commit()
     db.refresh(exercise)
     
+    return render(EXERCISE.dump(exercise))
+
+@api_router.get("/exercises")
+def get_exercises(response: Response, page: PageParams = Depends(page_params), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    exercises = paginate(db.query(ExerciseDB).filter(ExerciseDB.user_id == user_id), (ExerciseDB.date, ExerciseDB.created_at), ExerciseDB.id, page, response)
+    return render(EXERCISE.dump_many(exercises), response)
+
+
+def get_coach_provider() -> Optional[CoachProvider]:
+    return coach_provider
+
+def get_coach_context(db: Session, user_id: str) -> Dict[str, int]:
     return {
-        "id": exercise.id, "user_id": exercise.user_id,
-        "exercise_type": exercise.exercise_type, "content": exercise.content,
-        "completed": exercise.completed, "date": exercise.date,
-        "created_at": exercise.created_at.isoformat()
+        "goals": db.query(GoalDB.id).filter(GoalDB.user_id == user_id, GoalDB.status == "active").limit(10).count(),
+        "habits": db.query(HabitDB.id).filter(HabitDB.user_id == user_id).limit(10).count(),
+        "reflections": db.query(JournalEntryDB.id).filter(JournalEntryDB.user_id == user_id).limit(3).count(),
     }
 
-@api_router.get("/exercises")
-def get_exercises(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    exercises = db.query(ExerciseDB).filter(ExerciseDB.user_id == user_id).order_by(ExerciseDB.date.desc()).all()
-    return [{
-        "id": e.id, "user_id": e.user_id,
-        "exercise_type": e.exercise_type, "content": e.content,
-        "completed": e.completed, "date": e.date,
-        "created_at": e.created_at.isoformat() if e.created_at else None
-    } for e in exercises]
+def coach_session_id(request: AICoachRequest) -> str:
+    return request.context.get('session_id', str(uuid.uuid4())) if request.context else str(uuid.uuid4())
 
+def coach_mentor(request: AICoachRequest) -> str:
+    return resolve_mentor(request.context.get('mentor_personality', 'hill') if request.context else 'hill')
+
+async def save_coach_turn(user_id: str, session_id: str, mentor: str, history: List[Dict[str, str]], message: str, reply: str):
+    history = history + [{"role": "user", "text": message}, {"role": "model", "text": reply}]
+    await coach_sessions.save(user_id, session_id, mentor, trim_history(history, COACH_SESSION_MAX_TOKENS))
 
 @api_router.post("/ai-coach")
-def ai_coach(request: AICoachRequest, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+async def ai_coach(request: AICoachRequest, user_id: str = Depends(get_current_user), db: Session = Depends(get_db), provider: Optional[CoachProvider] = Depends(get_coach_provider)):
+    if provider is None:
+        raise HTTPException(status_code=500, detail="Google API key not configured")
     try:
-        if not GOOGLE_API_KEY:
-            raise HTTPException(status_code=500, detail="Google API key not configured")
-        
-        goals = db.query(GoalDB).filter(GoalDB.user_id == user_id, GoalDB.status == "active").limit(10).all()
-        habits = db.query(HabitDB).filter(HabitDB.user_id == user_id).limit(10).all()
-        journals = db.query(JournalEntryDB).filter(JournalEntryDB.user_id == user_id).order_by(JournalEntryDB.created_at.desc()).limit(3).all()
-        
-        mentor = request.context.get('mentor_personality', 'hill') if request.context else 'hill'
-        
-        mentor_prompts = {
-            'hill': f"""You are Napoleon Hill, author of 'Think and Grow Rich'. You help people develop a success mindset and achieve their definite chief aim.
-
-User Context:
-- Active Goals: {len(goals)}
-- Habits Tracked: {len(habits)}
-- Recent Reflections: {len(journals)}
-
-Your coaching style:
-- Focus on the power of thought, desire, and persistence
-- Emphasize developing a burning desire and definite purpose
-- Teach the principles of auto-suggestion and faith
-- Help users overcome fear and develop a millionaire mindset
-- Speak with authority and inspiration
-
-Be encouraging, visionary, and help users see their unlimited potential.""",
-            
-            'clear': f"""You are James Clear, author of 'Atomic Habits'. You help people build better habits through small, incremental changes.
-
-User Context:
-- Active Goals: {len(goals)}
-- Habits Tracked: {len(habits)}
-- Recent Reflections: {len(journals)}
-
-Your coaching style:
-- Focus on systems over goals
-- Teach the habit loop: cue, craving, response, reward
-- Emphasize making habits obvious, attractive, easy, and satisfying
-- Help users focus on identity-based habits
-- Use practical examples and scientific research
-
-Be practical, encouraging, and help users understand that small changes compound into remarkable results.""",
-            
-            'holiday': f"""You are Ryan Holiday, author of 'The Obstacle Is The Way'. You help people apply Stoic philosophy to modern challenges.
-
-User Context:
-- Active Goals: {len(goals)}
-- Habits Tracked: {len(habits)}
-- Recent Reflections: {len(journals)}
-
-Your coaching style:
-- Focus on perception, action, and will
-- Teach that the obstacle in the path becomes the path
-- Help users reframe challenges as opportunities
-- Emphasize what's in their control vs what's not
-- Speak with calm wisdom and philosophical depth
-
-Be thoughtful, challenging, and help users see that every obstacle contains the seed of an equal or greater opportunity."""
-        }
-        
-        context_info = mentor_prompts.get(mentor, mentor_prompts['hill'])
-        session_id = request.context.get('session_id', str(uuid.uuid4())) if request.context else str(uuid.uuid4())
-        
-        model = genai.GenerativeModel('gemini-2.0-flash', system_instruction=context_info)
-        response = model.generate_content(request.message)
-        response_text = response.text
-        
+        context = await run_db(db, get_coach_context, user_id)
+        mentor = coach_mentor(request)
+        session_id = coach_session_id(request)
+        history = await coach_sessions.load(user_id, session_id)
+        # Only opening turns are shared through the response cache; follow-ups depend on the history.
+        # use_cache=false bypasses it both ways, so one user's fresh reply never replaces the shared one
+        cache_key = response_cache_key(mentor, request.message, context) if not history and request.use_cache else None
+        response_text = coach_cache.get(cache_key) if cache_key else None
+        if response_text is None:
+            with coach_metrics.timed(mentor, "generate"):
+                response_text = await provider.generate(mentor, build_prompt(context, request.message), history)
+            if cache_key:
+                coach_cache.set(cache_key, response_text)
+        await save_coach_turn(user_id, session_id, mentor, history, request.message, response_text)
         return {"response": response_text, "session_id": session_id}
     
     except Exception as e:
         logger.error(f"AI Coach error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
+@api_router.post("/ai-coach/stream")
+async def ai_coach_stream(request: AICoachRequest, user_id: str = Depends(get_current_user), db: Session = Depends(get_db), provider: Optional[CoachProvider] = Depends(get_coach_provider)):
+    if provider is None:
+        raise HTTPException(status_code=500, detail="Google API key not configured")
+    context = await run_db(db, get_coach_context, user_id)
+    mentor = coach_mentor(request)
+    session_id = coach_session_id(request)
+    history = await coach_sessions.load(user_id, session_id)
+    cache_key = response_cache_key(mentor, request.message, context) if not history and request.use_cache else None
+    cached = coach_cache.get(cache_key) if cache_key else None
+    
+    async def events():
+        try:
+            if cached is not None:
+                reply = cached
+                yield f"data: {json.dumps({'text': cached})}\n\n"
+            else:
+                chunks = []
+                started = time.perf_counter()
+                with coach_metrics.timed(mentor, "stream"):
+                    async for chunk in provider.stream(mentor, build_prompt(context, request.message), history):
+                        if not chunks:
+                            coach_metrics.first_chunk.observe(time.perf_counter() - started, mentor)
+                        chunks.append(chunk)
+                        yield f"data: {json.dumps({'text': chunk})}\n\n"
+                reply = "".join(chunks)
+                if cache_key and reply:
+                    coach_cache.set(cache_key, reply)
+            await save_coach_turn(user_id, session_id, mentor, history, request.message, reply)
+            yield f"event: done\ndata: {json.dumps({'session_id': session_id})}\n\n"
+        except Exception as e:
+            logger.error(f"AI Coach stream error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': f'AI service error: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 
 @api_router.get("/analytics/overview")
-def get_analytics(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    goals = db.query(GoalDB).filter(GoalDB.user_id == user_id).all()
-    habits = db.query(HabitDB).filter(HabitDB.user_id == user_id).all()
-    journals = db.query(JournalEntryDB).filter(JournalEntryDB.user_id == user_id).all()
-    exercises = db.query(ExerciseDB).filter(ExerciseDB.user_id == user_id).all()
+@cached_read("goals", "habits", "journal", "exercises", conditional=False, vary=("today",))
+def get_analytics(request: Request, response: Response, user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
+    goal_counts = db.query(
+        func.coalesce(func.nullif(GoalDB.category, ''), 'personal'), GoalDB.status, func.count(GoalDB.id)
+    ).filter(GoalDB.user_id == user_id).group_by(
+        func.coalesce(func.nullif(GoalDB.category, ''), 'personal'), GoalDB.status
+    ).all()
     
-    total_goals = len(goals)
-    completed_goals = len([g for g in goals if g.status == 'completed'])
-    active_goals = len([g for g in goals if g.status == 'active'])
+    total_goals = completed_goals = active_goals = 0
+    goals_by_category = {}
+    for cat, goal_status, count in goal_counts:
+        total_goals += count
+        if goal_status == 'completed':
+            completed_goals += count
+        elif goal_status == 'active':
+            active_goals += count
+        bucket = goals_by_category.setdefault(cat, {'total': 0, 'completed': 0})
+        bucket['total'] += count
+        if goal_status == 'completed':
+            bucket['completed'] += count
     
-    total_habits = len(habits)
-    max_streak = max([h.streak for h in habits], default=0)
-    best_streak_ever = max([h.best_streak for h in habits], default=0)
-    avg_streak = sum([h.streak for h in habits]) / total_habits if total_habits > 0 else 0
+    total_habits, max_streak, best_streak_ever, streak_sum = db.query(
+        func.count(HabitDB.id), func.max(HabitDB.streak), func.max(HabitDB.best_streak), func.sum(HabitDB.streak)
+    ).filter(HabitDB.user_id == user_id).one()
+    max_streak = max_streak or 0
+    best_streak_ever = best_streak_ever or 0
+    avg_streak = (streak_sum or 0) / total_habits if total_habits > 0 else 0
     
-    today = datetime.now(timezone.utc).date()
     last_7_days = [(today - timedelta(days=i)).isoformat() for i in range(7)]
     
+    completions_by_date = dict(db.query(HabitCompletionDB.date, func.count(HabitCompletionDB.id)).filter(
+        HabitCompletionDB.user_id == user_id, HabitCompletionDB.date >= last_7_days[-1]
+    ).group_by(HabitCompletionDB.date).all())
     habit_completions = []
-    for date in last_7_days:
-        completed_today = sum(1 for h in habits if date in (h.completion_dates or []))
-        habit_completions.append({"date": date, "completed": completed_today, "total": total_habits})
-    
-    total_completions = sum(len(h.completion_dates or []) for h in habits)
+    for day in last_7_days:
+        habit_completions.append({"date": day, "completed": completions_by_date.get(day, 0), "total": total_habits})
     
-    goals_by_category = {}
-    for g in goals:
-        cat = g.category or 'personal'
-        if cat not in goals_by_category:
-            goals_by_category[cat] = {'total': 0, 'completed': 0}
-        goals_by_category[cat]['total'] += 1
-        if g.status == 'completed':
-            goals_by_category[cat]['completed'] += 1
+    total_completions = db.query(func.count(HabitCompletionDB.id)).filter(HabitCompletionDB.user_id == user_id).scalar()
     
+    journal_streak_row = db.query(StreakDB).filter(
+        StreakDB.user_id == user_id, StreakDB.entity_type == 'journal', StreakDB.entity_id == user_id
+    ).first()
     journal_streak = 0
-    if journals:
-        sorted_entries = sorted(journals, key=lambda x: x.date or '', reverse=True)
-        check_date = today
-        for entry in sorted_entries:
-            if entry.date == check_date.isoformat():
-                journal_streak += 1
-                check_date -= timedelta(days=1)
-            elif entry.date and entry.date < check_date.isoformat():
-                break
+    if journal_streak_row:
+        journal_streak = live_streak(StreakState.from_columns(journal_streak_row.current_streak, journal_streak_row.best_streak, journal_streak_row.last_date), today)
     
-    mood_counts = {}
-    for entry in journals:
-        mood = entry.mood or 'reflective'
-        mood_counts[mood] = mood_counts.get(mood, 0) + 1
+    mood_counts = dict(db.query(
+        func.coalesce(func.nullif(JournalEntryDB.mood, ''), 'reflective'), func.count(JournalEntryDB.id)
+    ).filter(JournalEntryDB.user_id == user_id).group_by(
+        func.coalesce(func.nullif(JournalEntryDB.mood, ''), 'reflective')
+    ).all())
+    total_entries = sum(mood_counts.values())
     
-    return {
+    total_exercises = db.query(func.count(ExerciseDB.id)).filter(ExerciseDB.user_id == user_id).scalar()
+    
+    return render({
         "goals": {
             "total": total_goals, "active": active_goals, "completed": completed_goals,
             "completion_rate": round(completed_goals / total_goals * 100, 1) if total_goals > 0 else 0,
@@ -897,14 +1315,13 @@ def get_analytics(user_id: str = Depends(get_current_user), db: Session = Depend
             "best_streak_ever": best_streak_ever,
             "avg_streak": round(avg_streak, 1), "total_completions": total_completions
         },
-        "journal": {"total_entries": len(journals), "current_streak": journal_streak, "mood_distribution": mood_counts},
-        "exercises": {"total_completed": len(exercises)},
+        "journal": {"total_entries": total_entries, "current_streak": journal_streak, "mood_distribution": mood_counts},
+        "exercises": {"total_completed": total_exercises},
         "habit_completions_7_days": habit_completions
-    }
+    }, response)
 
 
-@api_router.post("/rituals/complete")
-def complete_ritual(ritual_data: RitualCompleteRequest, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def add_ritual_completion(db: Session, user_id: str, ritual_data: RitualCompleteRequest) -> str:
     ritual_id = str(uuid.uuid4())
     ritual = RitualCompletionDB(
         id=ritual_id, user_id=user_id,
@@ -912,31 +1329,60 @@ def complete_ritual(ritual_data: RitualCompleteRequest, user_id: str = Depends(g
         completed_at=datetime.fromisoformat(ritual_data.completed_at.replace('Z', '+00:00'))
     )
     db.add(ritual)
+    return ritual_id
+
+@api_router.post("/rituals/complete")
+def complete_ritual(ritual_data: RitualCompleteRequest, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    ritual_id = add_ritual_completion(db, user_id, ritual_data)
     db.commit()
     return {"message": "Ritual completed", "id": ritual_id}
 
 @api_router.get("/rituals/completed")
 def get_completed_rituals(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     rituals = db.query(RitualCompletionDB).filter(RitualCompletionDB.user_id == user_id).order_by(RitualCompletionDB.completed_at.desc()).limit(50).all()
-    return [{"id": r.id, "user_id": r.user_id, "ritual_type": r.ritual_type, "completed_at": r.completed_at.isoformat() if r.completed_at else None} for r in rituals]
+    return render(RITUAL_COMPLETION.dump_many(rituals))
+
 
+@api_router.get("/wisdom/quotes")
+def get_wisdom_quotes(request: Request, philosophy: Optional[str] = Query(None), category: Optional[str] = Query(None)):
+    headers = {"ETag": quote_catalog.etag, "Cache-Control": "public, max-age=86400"}
+    if etag_matches(request.headers.get("if-none-match", ""), quote_catalog.etag):
+        return Response(status_code=304, headers=headers)
+    rendered = render(quote_catalog.filter(philosophy, category))
+    rendered.headers.update(headers)
+    return rendered
+
+@api_router.get("/wisdom/daily")
+def get_daily_quote(user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
+    quote = quote_catalog.quote_of_the_day(user_id, today)
+    favorite = db.query(WisdomFavoriteDB.id).filter(WisdomFavoriteDB.user_id == user_id, WisdomFavoriteDB.quote_id == quote.id).first() is not None
+    return render({"date": today.isoformat(), "quote": quote_catalog.payload(quote.id), "favorite": favorite})
 
 @api_router.post("/wisdom/favorites")
 def add_wisdom_favorite(favorite_data: WisdomFavoriteCreate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    existing = db.query(WisdomFavoriteDB).filter(WisdomFavoriteDB.user_id == user_id, WisdomFavoriteDB.quote_id == favorite_data.quote_id).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Already in favorites")
+    if favorite_data.quote_id not in quote_catalog:
+        raise HTTPException(status_code=404, detail="Quote not found")
     
     fav_id = str(uuid.uuid4())
-    fav = WisdomFavoriteDB(id=fav_id, user_id=user_id, quote_id=favorite_data.quote_id)
-    db.add(fav)
+    inserted = db.execute(
+        insert_for(db.get_bind(), WisdomFavoriteDB)
+        .values(id=fav_id, user_id=user_id, quote_id=favorite_data.quote_id, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=['user_id', 'quote_id'])
+    ).rowcount
+    if inserted:
+        collection_versions.touch(db, {(user_id, "wisdom_favorites")})
+    else:
+        fav_id = db.query(WisdomFavoriteDB.id).filter(WisdomFavoriteDB.user_id == user_id, WisdomFavoriteDB.quote_id == favorite_data.quote_id).scalar()
     db.commit()
     return {"message": "Added to favorites", "id": fav_id}
 
+def dump_favorites(db: Session, user_id: str, favs: List[WisdomFavoriteDB]) -> List[Dict[str, Any]]:
+    return [WISDOM_FAVORITE.dump(f, quote=quote_catalog.payload(f.quote_id)) for f in favs]
+
 @api_router.get("/wisdom/favorites")
-def get_wisdom_favorites(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    favs = db.query(WisdomFavoriteDB).filter(WisdomFavoriteDB.user_id == user_id).order_by(WisdomFavoriteDB.created_at.desc()).all()
-    return [{"id": f.id, "user_id": f.user_id, "quote_id": f.quote_id, "created_at": f.created_at.isoformat() if f.created_at else None} for f in favs]
+def get_wisdom_favorites(response: Response, page: PageParams = Depends(page_params), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    favs = paginate(db.query(WisdomFavoriteDB).filter(WisdomFavoriteDB.user_id == user_id), WisdomFavoriteDB.created_at, WisdomFavoriteDB.id, page, response)
+    return render(dump_favorites(db, user_id, favs), response)
 
 @api_router.delete("/wisdom/favorites/{quote_id}")
 def remove_wisdom_favorite(quote_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -963,12 +1409,13 @@ def create_identity_statement(data: IdentityStatementCreate, user_id: str = Depe
     db.add(stmt)
     db.commit()
     db.refresh(stmt)
-    return {"id": stmt.id, "user_id": stmt.user_id, "old_identity": stmt.old_identity, "new_identity": stmt.new_identity, "evidence_count": stmt.evidence_count, "strength_score": stmt.strength_score, "created_at": stmt.created_at.isoformat(), "updated_at": stmt.updated_at.isoformat()}
+    return render(IDENTITY_STATEMENT.dump(stmt))
 
 @api_router.get("/identity/statements")
-def get_identity_statements(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("identity_statements")
+def get_identity_statements(request: Request, response: Response, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     stmts = db.query(IdentityStatementDB).filter(IdentityStatementDB.user_id == user_id).all()
-    return [{"id": s.id, "user_id": s.user_id, "old_identity": s.old_identity, "new_identity": s.new_identity, "evidence_count": s.evidence_count, "strength_score": s.strength_score, "created_at": s.created_at.isoformat() if s.created_at else None, "updated_at": s.updated_at.isoformat() if s.updated_at else None} for s in stmts]
+    return render(IDENTITY_STATEMENT.dump_many(stmts), response)
 
 @api_router.post("/identity/evidence")
 def add_identity_evidence(data: IdentityEvidenceCreate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -987,12 +1434,12 @@ def add_identity_evidence(data: IdentityEvidenceCreate, user_id: str = Depends(g
         stmt.updated_at = datetime.now(timezone.utc)
         db.commit()
     
-    return {"id": ev.id, "user_id": ev.user_id, "identity_id": ev.identity_id, "evidence_text": ev.evidence_text, "date": ev.date, "created_at": ev.created_at.isoformat()}
+    return render(IDENTITY_EVIDENCE.dump(ev))
 
 @api_router.get("/identity/evidence/{identity_id}")
-def get_identity_evidence(identity_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    evs = db.query(IdentityEvidenceDB).filter(IdentityEvidenceDB.user_id == user_id, IdentityEvidenceDB.identity_id == identity_id).order_by(IdentityEvidenceDB.created_at.desc()).all()
-    return [{"id": e.id, "user_id": e.user_id, "identity_id": e.identity_id, "evidence_text": e.evidence_text, "date": e.date, "created_at": e.created_at.isoformat() if e.created_at else None} for e in evs]
+def get_identity_evidence(identity_id: str, response: Response, page: PageParams = Depends(page_params), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    evs = paginate(db.query(IdentityEvidenceDB).filter(IdentityEvidenceDB.user_id == user_id, IdentityEvidenceDB.identity_id == identity_id), IdentityEvidenceDB.created_at, IdentityEvidenceDB.id, page, response)
+    return render(IDENTITY_EVIDENCE.dump_many(evs), response)
 
 
 @api_router.post("/obstacles")
@@ -1002,12 +1449,12 @@ def create_obstacle(data: ObstacleCreate, user_id: str = Depends(get_current_use
     db.add(obs)
     db.commit()
     db.refresh(obs)
-    return {"id": obs.id, "user_id": obs.user_id, "obstacle_text": obs.obstacle_text, "perception": obs.perception, "action": obs.action, "will": obs.will, "status": obs.status, "transformed_at": obs.transformed_at, "created_at": obs.created_at.isoformat(), "updated_at": obs.updated_at.isoformat()}
+    return render(OBSTACLE.dump(obs))
 
 @api_router.get("/obstacles")
-def get_obstacles(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    obs_list = db.query(ObstacleDB).filter(ObstacleDB.user_id == user_id).order_by(ObstacleDB.created_at.desc()).all()
-    return [{"id": o.id, "user_id": o.user_id, "obstacle_text": o.obstacle_text, "perception": o.perception, "action": o.action, "will": o.will, "status": o.status, "transformed_at": o.transformed_at, "created_at": o.created_at.isoformat() if o.created_at else None, "updated_at": o.updated_at.isoformat() if o.updated_at else None} for o in obs_list]
+def get_obstacles(response: Response, page: PageParams = Depends(page_params), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    obs_list = paginate(db.query(ObstacleDB).filter(ObstacleDB.user_id == user_id), ObstacleDB.created_at, ObstacleDB.id, page, response)
+    return render(OBSTACLE.dump_many(obs_list), response)
 
 @api_router.put("/obstacles/{obstacle_id}")
 def update_obstacle(obstacle_id: str, data: ObstacleUpdate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -1027,7 +1474,7 @@ def update_obstacle(obstacle_id: str, data: ObstacleUpdate, user_id: str = Depen
     obs.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(obs)
-    return {"id": obs.id, "user_id": obs.user_id, "obstacle_text": obs.obstacle_text, "perception": obs.perception, "action": obs.action, "will": obs.will, "status": obs.status, "transformed_at": obs.transformed_at, "created_at": obs.created_at.isoformat(), "updated_at": obs.updated_at.isoformat()}
+    return render(OBSTACLE.dump(obs))
 
 @api_router.delete("/obstacles/{obstacle_id}")
 def delete_obstacle(obstacle_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -1051,35 +1498,40 @@ def create_burning_desire(data: BurningDesireCreate, user_id: str = Depends(get_
         existing.updated_at = datetime.now(timezone.utc)
         db.commit()
         db.refresh(existing)
-        return {"id": existing.id, "user_id": existing.user_id, "desire_text": existing.desire_text, "why_text": existing.why_text, "vision_text": existing.vision_text, "intensity": existing.intensity, "created_at": existing.created_at.isoformat(), "updated_at": existing.updated_at.isoformat()}
+        return render(BURNING_DESIRE.dump(existing))
     else:
         des_id = str(uuid.uuid4())
         des = BurningDesireDB(id=des_id, user_id=user_id, desire_text=data.desire_text, why_text=data.why_text, vision_text=data.vision_text, intensity=data.intensity)
         db.add(des)
         db.commit()
         db.refresh(des)
-        return {"id": des.id, "user_id": des.user_id, "desire_text": des.desire_text, "why_text": des.why_text, "vision_text": des.vision_text, "intensity": des.intensity, "created_at": des.created_at.isoformat(), "updated_at": des.updated_at.isoformat()}
+        return render(BURNING_DESIRE.dump(des))
 
 @api_router.get("/burning-desire")
-def get_burning_desire(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("burning_desire")
+def get_burning_desire(request: Request, response: Response, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     des = db.query(BurningDesireDB).filter(BurningDesireDB.user_id == user_id).first()
     if not des:
         raise HTTPException(status_code=404, detail="No burning desire set")
-    return {"id": des.id, "user_id": des.user_id, "desire_text": des.desire_text, "why_text": des.why_text, "vision_text": des.vision_text, "intensity": des.intensity, "created_at": des.created_at.isoformat(), "updated_at": des.updated_at.isoformat()}
+    return render(BURNING_DESIRE.dump(des), response)
 
-@api_router.post("/burning-desire/visualizations")
-def create_visualization(data: DesireVisualizationCreate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def add_visualization(db: Session, user_id: str, data: DesireVisualizationCreate) -> DesireVisualizationDB:
     viz_id = str(uuid.uuid4())
     viz = DesireVisualizationDB(id=viz_id, user_id=user_id, desire_id=data.desire_id, intensity_rating=data.intensity_rating, emotion=data.emotion, notes=data.notes, date=datetime.now(timezone.utc).date().isoformat())
     db.add(viz)
+    return viz
+
+@api_router.post("/burning-desire/visualizations")
+def create_visualization(data: DesireVisualizationCreate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    viz = add_visualization(db, user_id, data)
     db.commit()
     db.refresh(viz)
-    return {"id": viz.id, "user_id": viz.user_id, "desire_id": viz.desire_id, "intensity_rating": viz.intensity_rating, "emotion": viz.emotion, "notes": viz.notes, "date": viz.date, "created_at": viz.created_at.isoformat()}
+    return render(DESIRE_VISUALIZATION.dump(viz))
 
 @api_router.get("/burning-desire/visualizations")
 def get_visualizations(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     vizs = db.query(DesireVisualizationDB).filter(DesireVisualizationDB.user_id == user_id).order_by(DesireVisualizationDB.created_at.desc()).limit(30).all()
-    return [{"id": v.id, "user_id": v.user_id, "desire_id": v.desire_id, "intensity_rating": v.intensity_rating, "emotion": v.emotion, "notes": v.notes, "date": v.date, "created_at": v.created_at.isoformat() if v.created_at else None} for v in vizs]
+    return render(DESIRE_VISUALIZATION.dump_many(vizs))
 
 
 @api_router.post("/premeditatio")
@@ -1089,12 +1541,12 @@ def create_premeditatio(data: PremeditatioPracticeCreate, user_id: str = Depends
     db.add(practice)
     db.commit()
     db.refresh(practice)
-    return {"id": practice.id, "user_id": practice.user_id, "scenario": practice.scenario, "potential_obstacles": practice.potential_obstacles, "planned_responses": practice.planned_responses, "resilience_score": practice.resilience_score, "actual_outcome": practice.actual_outcome, "lessons_learned": practice.lessons_learned, "date": practice.date, "created_at": practice.created_at.isoformat(), "updated_at": practice.updated_at.isoformat()}
+    return render(PREMEDITATIO_PRACTICE.dump(practice))
 
 @api_router.get("/premeditatio")
-def get_premeditatio_practices(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    practices = db.query(PremeditatioPracticeDB).filter(PremeditatioPracticeDB.user_id == user_id).order_by(PremeditatioPracticeDB.created_at.desc()).all()
-    return [{"id": p.id, "user_id": p.user_id, "scenario": p.scenario, "potential_obstacles": p.potential_obstacles or [], "planned_responses": p.planned_responses or [], "resilience_score": p.resilience_score, "actual_outcome": p.actual_outcome, "lessons_learned": p.lessons_learned, "date": p.date, "created_at": p.created_at.isoformat() if p.created_at else None, "updated_at": p.updated_at.isoformat() if p.updated_at else None} for p in practices]
+def get_premeditatio_practices(response: Response, page: PageParams = Depends(page_params), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    practices = paginate(db.query(PremeditatioPracticeDB).filter(PremeditatioPracticeDB.user_id == user_id), PremeditatioPracticeDB.created_at, PremeditatioPracticeDB.id, page, response)
+    return render(PREMEDITATIO_PRACTICE.dump_many(practices), response)
 
 @api_router.put("/premeditatio/{practice_id}")
 def update_premeditatio(practice_id: str, data: PremeditatioPracticeUpdate, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -1109,7 +1561,7 @@ def update_premeditatio(practice_id: str, data: PremeditatioPracticeUpdate, user
     practice.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(practice)
-    return {"id": practice.id, "user_id": practice.user_id, "scenario": practice.scenario, "potential_obstacles": practice.potential_obstacles or [], "planned_responses": practice.planned_responses or [], "resilience_score": practice.resilience_score, "actual_outcome": practice.actual_outcome, "lessons_learned": practice.lessons_learned, "date": practice.date, "created_at": practice.created_at.isoformat(), "updated_at": practice.updated_at.isoformat()}
+    return render(PREMEDITATIO_PRACTICE.dump(practice))
 
 
 @api_router.post("/habit-stacking")
@@ -1119,15 +1571,16 @@ def create_habit_chain(data: HabitChainCreate, user_id: str = Depends(get_curren
     db.add(chain)
     db.commit()
     db.refresh(chain)
-    return {"id": chain.id, "user_id": chain.user_id, "name": chain.name, "existing_habit": chain.existing_habit, "new_habit": chain.new_habit, "chain_items": chain.chain_items or [], "success_count": chain.success_count, "total_attempts": chain.total_attempts, "chain_strength": chain.chain_strength, "created_at": chain.created_at.isoformat(), "updated_at": chain.updated_at.isoformat()}
+    return render(HABIT_CHAIN.dump(chain))
 
 @api_router.get("/habit-stacking")
-def get_habit_chains(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("habit_chains")
+def get_habit_chains(request: Request, response: Response, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     chains = db.query(HabitChainDB).filter(HabitChainDB.user_id == user_id).all()
-    return [{"id": c.id, "user_id": c.user_id, "name": c.name, "existing_habit": c.existing_habit, "new_habit": c.new_habit, "chain_items": c.chain_items or [], "success_count": c.success_count, "total_attempts": c.total_attempts, "chain_strength": c.chain_strength, "created_at": c.created_at.isoformat() if c.created_at else None, "updated_at": c.updated_at.isoformat() if c.updated_at else None} for c in chains]
+    return render(HABIT_CHAIN.dump_many(chains), response)
 
 @api_router.post("/habit-stacking/complete")
-def complete_habit_chain(data: HabitChainCompletion, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def complete_habit_chain(data: HabitChainCompletion, user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
     chain = db.query(HabitChainDB).filter(HabitChainDB.id == data.chain_id, HabitChainDB.user_id == user_id).first()
     if not chain:
         raise HTTPException(status_code=404, detail="Chain not found")
@@ -1137,11 +1590,12 @@ def complete_habit_chain(data: HabitChainCompletion, user_id: str = Depends(get_
     chain.chain_strength = int((chain.success_count / chain.total_attempts) * 100) if chain.total_attempts > 0 else 0
     chain.updated_at = datetime.now(timezone.utc)
     
-    comp = HabitChainCompletionDB(id=str(uuid.uuid4()), user_id=user_id, chain_id=data.chain_id, success=data.success, date=datetime.now(timezone.utc).date().isoformat())
+    comp = HabitChainCompletionDB(id=str(uuid.uuid4()), user_id=user_id, chain_id=data.chain_id, success=data.success, date=today.isoformat())
     db.add(comp)
+    state = record_streak(db, user_id, 'habit_chain', chain.id, today, success=data.success)
     db.commit()
     
-    return {"message": "Chain completion recorded", "chain_strength": chain.chain_strength}
+    return {"message": "Chain completion recorded", "chain_strength": chain.chain_strength, "streak": state.current, "best_streak": state.best}
 
 
 @api_router.post("/journey/milestones")
@@ -1151,12 +1605,12 @@ def create_journey_milestone(data: JourneyMilestoneCreate, user_id: str = Depend
     db.add(ms)
     db.commit()
     db.refresh(ms)
-    return {"id": ms.id, "user_id": ms.user_id, "title": ms.title, "description": ms.description, "category": ms.category, "emotion": ms.emotion, "date": ms.date, "created_at": ms.created_at.isoformat()}
+    return render(JOURNEY_MILESTONE.dump(ms))
 
 @api_router.get("/journey/milestones")
-def get_journey_milestones(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    milestones = db.query(JourneyMilestoneDB).filter(JourneyMilestoneDB.user_id == user_id).order_by(JourneyMilestoneDB.date.desc()).all()
-    return [{"id": m.id, "user_id": m.user_id, "title": m.title, "description": m.description, "category": m.category, "emotion": m.emotion, "date": m.date, "created_at": m.created_at.isoformat() if m.created_at else None} for m in milestones]
+def get_journey_milestones(response: Response, page: PageParams = Depends(page_params), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    milestones = paginate(db.query(JourneyMilestoneDB).filter(JourneyMilestoneDB.user_id == user_id), (JourneyMilestoneDB.date, JourneyMilestoneDB.created_at), JourneyMilestoneDB.id, page, response)
+    return render(JOURNEY_MILESTONE.dump_many(milestones), response)
 
 @api_router.delete("/journey/milestones/{milestone_id}")
 def delete_journey_milestone(milestone_id: str, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -1181,21 +1635,22 @@ def create_legacy_statement(data: LegacyStatementCreate, user_id: str = Depends(
         existing.updated_at = datetime.now(timezone.utc)
         db.commit()
         db.refresh(existing)
-        return {"id": existing.id, "user_id": existing.user_id, "legacy_text": existing.legacy_text, "values": existing.values or [], "impact_areas": existing.impact_areas or [], "future_self_letter": existing.future_self_letter, "mission_statement": existing.mission_statement, "created_at": existing.created_at.isoformat(), "updated_at": existing.updated_at.isoformat()}
+        return render(LEGACY_STATEMENT.dump(existing))
     else:
         leg_id = str(uuid.uuid4())
         leg = LegacyStatementDB(id=leg_id, user_id=user_id, legacy_text=data.legacy_text, values=data.values or [], impact_areas=data.impact_areas or [], future_self_letter=data.future_self_letter, mission_statement=data.mission_statement)
         db.add(leg)
         db.commit()
         db.refresh(leg)
-        return {"id": leg.id, "user_id": leg.user_id, "legacy_text": leg.legacy_text, "values": leg.values or [], "impact_areas": leg.impact_areas or [], "future_self_letter": leg.future_self_letter, "mission_statement": leg.mission_statement, "created_at": leg.created_at.isoformat(), "updated_at": leg.updated_at.isoformat()}
+        return render(LEGACY_STATEMENT.dump(leg))
 
 @api_router.get("/legacy")
-def get_legacy_statement(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("legacy")
+def get_legacy_statement(request: Request, response: Response, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     leg = db.query(LegacyStatementDB).filter(LegacyStatementDB.user_id == user_id).first()
     if not leg:
         raise HTTPException(status_code=404, detail="No legacy statement set")
-    return {"id": leg.id, "user_id": leg.user_id, "legacy_text": leg.legacy_text, "values": leg.values or [], "impact_areas": leg.impact_areas or [], "future_self_letter": leg.future_self_letter, "mission_statement": leg.mission_statement, "created_at": leg.created_at.isoformat(), "updated_at": leg.updated_at.isoformat()}
+    return render(LEGACY_STATEMENT.dump(leg), response)
 
 
 @api_router.post("/morning-algorithm")
@@ -1205,37 +1660,26 @@ def create_morning_routine(data: MorningRoutineCreate, user_id: str = Depends(ge
     db.add(routine)
     db.commit()
     db.refresh(routine)
-    return {"id": routine.id, "user_id": routine.user_id, "routine_name": routine.routine_name, "philosophy": routine.philosophy, "steps": routine.steps or [], "total_duration": routine.total_duration, "streak": routine.streak, "best_streak": routine.best_streak, "last_completed": routine.last_completed, "created_at": routine.created_at.isoformat(), "updated_at": routine.updated_at.isoformat()}
+    return render(MORNING_ROUTINE.dump(routine))
 
 @api_router.get("/morning-algorithm")
-def get_morning_routines(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+@cached_read("morning_routines")
+def get_morning_routines(request: Request, response: Response, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     routines = db.query(MorningRoutineDB).filter(MorningRoutineDB.user_id == user_id).all()
-    return [{"id": r.id, "user_id": r.user_id, "routine_name": r.routine_name, "philosophy": r.philosophy, "steps": r.steps or [], "total_duration": r.total_duration, "streak": r.streak, "best_streak": r.best_streak, "last_completed": r.last_completed, "created_at": r.created_at.isoformat() if r.created_at else None, "updated_at": r.updated_at.isoformat() if r.updated_at else None} for r in routines]
+    return render(MORNING_ROUTINE.dump_many(routines), response)
 
 @api_router.post("/morning-algorithm/complete")
-def complete_morning_routine(data: MorningRoutineCompletion, user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def complete_morning_routine(data: MorningRoutineCompletion, user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
     routine = db.query(MorningRoutineDB).filter(MorningRoutineDB.id == data.routine_id, MorningRoutineDB.user_id == user_id).first()
     if not routine:
         raise HTTPException(status_code=404, detail="Routine not found")
     
-    today = datetime.now(timezone.utc).date()
-    last_completed = routine.last_completed
-    current_streak = routine.streak
-    
-    if last_completed:
-        last_date = datetime.fromisoformat(last_completed).date()
-        if (today - last_date).days == 1:
-            current_streak += 1
-        elif (today - last_date).days == 0:
-            pass
-        else:
-            current_streak = 1
-    else:
-        current_streak = 1
+    state = advance(StreakState.from_columns(routine.streak, routine.best_streak, routine.last_completed), today)
+    current_streak = state.current
     
-    routine.streak = current_streak
-    routine.best_streak = max(routine.best_streak, current_streak)
-    routine.last_completed = today.isoformat()
+    routine.streak = state.current
+    routine.best_streak = state.best
+    routine.last_completed = state.last_date.isoformat()
     routine.updated_at = datetime.now(timezone.utc)
     
     comp = MorningRoutineCompletionDB(id=str(uuid.uuid4()), user_id=user_id, routine_id=data.routine_id, completed_steps=data.completed_steps, date=today.isoformat())
@@ -1245,9 +1689,158 @@ def complete_morning_routine(data: MorningRoutineCompletion, user_id: str = Depe
     return {"message": "Routine completed", "streak": current_streak, "best_streak": routine.best_streak}
 
 
+batch_operations = BatchRegistry(IdempotencyKeyDB)
+
+def operation_day(day: Optional[date], today: date) -> date:
+    # Offline clients replay events on the day they happened, never ahead of the user's today
+    if day is None:
+        return today
+    if day > today:
+        raise HTTPException(status_code=400, detail="Date is in the future")
+    return day
+
+@batch_operations.register("habit.complete", HabitCompleteOperation)
+def batch_complete_habit(db: Session, user_id: str, data: HabitCompleteOperation, today: date):
+    return apply_habit_completion(db, user_id, data.habit_id, operation_day(data.day, today))
+
+@batch_operations.register("journal.create", JournalEntryOperation)
+def batch_create_journal_entry(db: Session, user_id: str, data: JournalEntryOperation, today: date):
+    entry = add_journal_entry(db, user_id, data, operation_day(data.day, today))
+    # Reloaded so timestamps come back from the database exactly as the single-call endpoint returns them
+    db.flush()
+    db.refresh(entry)
+    return JOURNAL_ENTRY.dump(entry)
+
+@batch_operations.register("ritual.complete", RitualCompleteRequest)
+def batch_complete_ritual(db: Session, user_id: str, data: RitualCompleteRequest, today: date):
+    try:
+        return {"message": "Ritual completed", "id": add_ritual_completion(db, user_id, data)}
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid completed_at")
+
+@batch_operations.register("visualization.create", DesireVisualizationCreate)
+def batch_create_visualization(db: Session, user_id: str, data: DesireVisualizationCreate, today: date):
+    viz = add_visualization(db, user_id, data)
+    db.flush()
+    db.refresh(viz)
+    return DESIRE_VISUALIZATION.dump(viz)
+
+def dump_habits(db: Session, user_id: str, habits: List[HabitDB]) -> List[Dict[str, Any]]:
+    completion_dates = get_completion_dates(db, user_id, [h.id for h in habits])
+    return [HABIT.dump(h, completion_dates=completion_dates[h.id]) for h in habits]
+
+def dump_with(schema):
+    return lambda db, user_id, rows: schema.dump_many(rows)
+
+SYNC_SOURCES = [
+    SyncSource("goals", GoalDB, dump_with(GOAL)),
+    SyncSource("habits", HabitDB, dump_habits),
+    SyncSource("vision_board", VisionBoardItemDB, dump_with(VISION_BOARD_ITEM)),
+    SyncSource("journal", JournalEntryDB, dump_with(JOURNAL_ENTRY)),
+    SyncSource("exercises", ExerciseDB, dump_with(EXERCISE)),
+    SyncSource("rituals", RitualCompletionDB, dump_with(RITUAL_COMPLETION)),
+    SyncSource("wisdom_favorites", WisdomFavoriteDB, dump_favorites),
+    SyncSource("identity_statements", IdentityStatementDB, dump_with(IDENTITY_STATEMENT)),
+    SyncSource("identity_evidence", IdentityEvidenceDB, dump_with(IDENTITY_EVIDENCE)),
+    SyncSource("obstacles", ObstacleDB, dump_with(OBSTACLE)),
+    SyncSource("burning_desire", BurningDesireDB, dump_with(BURNING_DESIRE)),
+    SyncSource("visualizations", DesireVisualizationDB, dump_with(DESIRE_VISUALIZATION)),
+    SyncSource("premeditatio", PremeditatioPracticeDB, dump_with(PREMEDITATIO_PRACTICE)),
+    SyncSource("habit_chains", HabitChainDB, dump_with(HABIT_CHAIN)),
+    SyncSource("journey_milestones", JourneyMilestoneDB, dump_with(JOURNEY_MILESTONE)),
+    SyncSource("legacy", LegacyStatementDB, dump_with(LEGACY_STATEMENT)),
+    SyncSource("morning_routines", MorningRoutineDB, dump_with(MORNING_ROUTINE)),
+]
+record_deletes(TombstoneDB, SYNC_SOURCES)
+collection_versions = CollectionVersions(CollectionVersionDB, {source.model: source.name for source in SYNC_SOURCES})
+@api_router.get("/sync")
+def sync_changes(since: Optional[str] = Query(None), limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=max(SYNC_PAGE_SIZE, MAX_PAGE_SIZE)), cursor: Optional[str] = Query(None), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    return render(collect_changes(db, user_id, parse_watermark(since), SYNC_SOURCES, TombstoneDB, SYNC_WATERMARK_LAG, limit, cursor))
+
+@api_router.get("/search")
+def search_history(response: Response, q: str = Query(..., min_length=1, max_length=256), types: Optional[str] = Query(None), limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = Query(None), user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+    documents = resolve_documents(types)
+    offset = decode_offset(cursor)
+    hits = search(db, user_id, q, documents, limit + 1, offset)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_offset(offset + limit)
+    return render(load_hits(db, user_id, hits, {source.name: source for source in SYNC_SOURCES}), response)
+
+@api_router.post("/batch")
+def run_batch(request: BatchRequest, user_id: str = Depends(get_current_user), today: date = Depends(get_today), db: Session = Depends(get_db)):
+    return render({"results": batch_operations.apply(db, user_id, request.operations, today)})
+
+
 @app.get("/api/health")
 def health_check():
-    return {"status": "healthy", "service": "growth-mindset-api", "database": "postgresql"}
+    # Liveness only: never touches the database, so a slow DB doesn't get healthy workers restarted
+    return {"status": "healthy", "service": "growth-mindset-api", "database": engine.dialect.name}
+
+def ping_sync_engine() -> float:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return time.perf_counter() - started
+
+async def ping_async_engine() -> float:
+    started = time.perf_counter()
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    return time.perf_counter() - started
+
+@app.get("/api/health/ready")
+async def readiness_check():
+    checks = {'sync': lambda: run_in_threadpool(ping_sync_engine)}
+    if async_engine is not None:
+        checks['async'] = ping_async_engine
+    pools, ready = {}, True
+    for name, ping in checks.items():
+        try:
+            latency = await asyncio.wait_for(ping(), timeout=HEALTH_DB_TIMEOUT)
+            pools[name] = {"status": "ok", "latency_ms": round(latency * 1000, 2)}
+        except Exception as e:
+            ready = False
+            pools[name] = {"status": "error", "error": str(e) or type(e).__name__}
+    body = {"status": "ready" if ready else "unavailable", "database": engine.dialect.name, "pools": pools}
+    return FastJSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/api/health/pool")
+def pool_health():
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+@app.get("/api/health/auth")
+def auth_health():
+    return {"hashing_pool": hashing_pool.stats(), "bcrypt_rounds": BCRYPT_ROUNDS, "token_cache": token_cache.stats(), "revoked_tokens": len(token_denylist)}
+
+metrics_registry.collector(pool_collector(pool_stats))
+metrics_registry.collector(stats_collector(
+    "cache", "Cache statistics",
+    lambda: {"token": token_cache.stats(), "ai_coach": coach_cache.stats(), "read": read_cache.stats() if read_cache else None},
+    ("entries", "hits", "misses", "evictions", "bytes"),
+))
+metrics_registry.collector(stats_collector("hashing_pool", "Password hashing pool", lambda: {"bcrypt": hashing_pool.stats()}, ("workers", "in_flight", "max_pending", "rejected")))
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+if query_profiler:
+    # Dev-mode only, never enable QUERY_PROFILE in production: statements and their parameters are kept in memory
+    @app.get("/api/debug/query-profile")
+    def query_profile_report(limit: int = Query(50, ge=1, le=1000)):
+        return query_profiler.report(limit)
+
+    @app.delete("/api/debug/query-profile")
+    def reset_query_profile():
+        query_profiler.reset()
+        return {"message": "Query profile reset"}
+
+@app.get("/api/health/cache")
+def cache_health():
+    return {"ai_coach": coach_cache.stats(), "read": read_cache.stats() if read_cache else None}
 
 
 app.include_router(api_router)
@@ -1258,4 +1851,9 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"] + ([PROFILE_HEADER] if query_profiler else []),
 )
+if query_profiler:
+    app.add_middleware(ProfilerMiddleware, profiler=query_profiler)
+# Added last so it is outermost and times CORS and error handling too
+app.add_middleware(MetricsMiddleware, metrics=http_metrics)
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+@dataclass(frozen=True)
+class StreakState:
+    current: int = 0
+    best: int = 0
+    last_date: Optional[date] = None
+
+    @classmethod
+    def from_columns(cls, current: Optional[int], best: Optional[int], last_date: Optional[str]) -> "StreakState":
+        return cls(current or 0, best or 0, date.fromisoformat(last_date[:10]) if last_date else None)
+
+
+def advance(state: StreakState, day: date) -> StreakState:
+    # Repeat events on the same day (or late events for an earlier day) never change the streak
+    if state.last_date is not None and day <= state.last_date:
+        return state
+    current = state.current + 1 if state.last_date == day - timedelta(days=1) else 1
+    return StreakState(current, max(state.best, current), day)
+
+
+def reset(state: StreakState, day: date) -> StreakState:
+    if state.last_date is not None and day < state.last_date:
+        return state
+    return StreakState(0, state.best, day)
+
+
+def replay(days: Iterable[date]) -> StreakState:
+    state = StreakState()
+    for day in sorted(set(days)):
+        state = advance(state, day)
+    return state
+
+
+def live_streak(state: StreakState, today: date) -> int:
+    # A streak stays alive until a full day has been missed
+    if state.last_date is None or (today - state.last_date).days > 1:
+        return 0
+    return state.current
+
+
+def resolve_timezone(name: Optional[str]) -> tzinfo:
+    if not name:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def local_today(tz_name: Optional[str] = None) -> date:
+    return datetime.now(resolve_timezone(tz_name)).date()
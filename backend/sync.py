@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+import base64
+import json
+import uuid
+
+# Cursor key for the tombstone feed; never a collection name
+DELETED = "$deleted"
+
+
+class SyncSource(NamedTuple):
+    name: str
+    model: Any
+    dump: Callable
+
+
+def format_watermark(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def parse_watermark(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid watermark")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def record_deletes(tombstone_model, sources: Sequence[SyncSource]):
+    names = {source.model: source.name for source in sources}
+
+    @event.listens_for(Session, "before_flush")
+    def add_tombstones(session, flush_context, instances):
+        deleted = [obj for obj in session.deleted if type(obj) in names]
+        if not deleted:
+            return
+        now = datetime.now(timezone.utc)
+        for obj in deleted:
+            session.add(tombstone_model(id=str(uuid.uuid4()), user_id=obj.user_id, collection=names[type(obj)], row_id=obj.id, deleted_at=now))
+
+    return add_tombstones
+
+
+class SyncCursor(NamedTuple):
+    since: Optional[datetime]
+    watermark: datetime
+    # Collection -> (updated_at, id) of the last row sent; collections missing from it are complete
+    positions: Dict[str, tuple]
+
+
+def encode_sync_cursor(cursor: SyncCursor) -> str:
+    payload = {
+        "since": cursor.since.isoformat() if cursor.since else None,
+        "watermark": cursor.watermark.isoformat(),
+        "positions": {name: [at.isoformat(), row_id] for name, (at, row_id) in cursor.positions.items()},
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> SyncCursor:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return SyncCursor(
+            datetime.fromisoformat(payload["since"]) if payload["since"] else None,
+            datetime.fromisoformat(payload["watermark"]),
+            {name: (datetime.fromisoformat(at), str(row_id)) for name, (at, row_id) in payload["positions"].items()},
+        )
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def changed_rows(query, changed_at, id_column, since: Optional[datetime], position: Optional[tuple], limit: int):
+    # Oldest change first on (changed_at, id), so a page boundary inside a run of equal timestamps is exact
+    if position is not None:
+        at, row_id = position
+        query = query.filter(or_(changed_at > at, and_(changed_at == at, id_column > row_id)))
+    elif since is not None:
+        query = query.filter(changed_at > since)
+    rows = query.order_by(changed_at, id_column).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def collect_changes(db, user_id: str, since: Optional[datetime], sources: Sequence[SyncSource], tombstone_model, lag: float,
+                    limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    # The watermark trails "now" by `lag` seconds so rows written by transactions still in flight are
+    # picked up by the next poll; clients may see a row twice but never miss one.
+    # At most `limit` rows per collection are sent; until the last page the watermark stays at `since`
+    # and `cursor` continues the same run, so a client that stops early resumes without gaps
+    if cursor:
+        state = decode_sync_cursor(cursor)
+        since, watermark, pending = state.since, state.watermark, state.positions
+    else:
+        watermark = datetime.now(timezone.utc) - timedelta(seconds=lag)
+        pending = None
+    positions: Dict[str, tuple] = {}
+    changes: Dict[str, List[Dict[str, Any]]] = {}
+    for source in sources:
+        if pending is not None and source.name not in pending:
+            continue
+        model = source.model
+        rows, more = changed_rows(
+            db.query(model).filter(model.user_id == user_id), model.updated_at, model.id,
+            since, pending.get(source.name) if pending else None, limit,
+        )
+        if rows:
+            changes[source.name] = source.dump(db, user_id, rows)
+        if more:
+            positions[source.name] = (rows[-1].updated_at, rows[-1].id)
+    deleted: Dict[str, List[str]] = {}
+    if since is not None and (pending is None or DELETED in pending):
+        rows, more = changed_rows(
+            db.query(tombstone_model).filter(tombstone_model.user_id == user_id), tombstone_model.deleted_at, tombstone_model.id,
+            since, pending.get(DELETED) if pending else None, limit,
+        )
+        for row in rows:
+            deleted.setdefault(row.collection, []).append(row.row_id)
+        if more:
+            positions[DELETED] = (rows[-1].deleted_at, rows[-1].id)
+    if positions:
+        return {
+            "watermark": format_watermark(since) if since else None, "changes": changes, "deleted": deleted,
+            "cursor": encode_sync_cursor(SyncCursor(since, watermark, positions)),
+        }
+    return {"watermark": format_watermark(watermark if since is None or watermark > since else since), "changes": changes, "deleted": deleted, "cursor": None}
@@ -0,0 +1,50 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+import threading
+import time
+
+
+class TokenClaims(NamedTuple):
+    user_id: str
+    jti: str
+    exp: float
+
+
+class TokenDenylist:
+    # In-memory view of revoked token ids, topped up from the database every `refresh_interval` seconds
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_refresh = 0.0
+        self.synced_until: Optional[float] = None
+
+    def is_revoked(self, jti: str) -> bool:
+        expires = self._revoked.get(jti)
+        return expires is not None and expires > time.time()
+
+    def add(self, jti: str, expires: float):
+        with self._lock:
+            self._revoked[jti] = expires
+
+    def claim_refresh(self) -> bool:
+        # Single-flight: only the caller that finds the view stale refreshes it, everyone else keeps going
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_refresh:
+                return False
+            self._next_refresh = now + self.refresh_interval
+            return True
+
+    def merge(self, revocations: Iterable[Tuple[str, float]], synced_until: float):
+        now = time.time()
+        with self._lock:
+            for jti, expires in revocations:
+                self._revoked[jti] = expires
+            # Expired tokens fail signature checks anyway, so their entries can go
+            for jti in [j for j, expires in self._revoked.items() if expires <= now]:
+                del self._revoked[jti]
+            self.synced_until = synced_until
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def __len__(self) -> int:
+        return len(self._revoked)
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Dict, Optional, Sequence, Set, Tuple
+import hashlib
+
+from dialects import insert_for
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class CollectionVersions:
+    # Per-user, per-collection counters bumped in the same transaction as the rows they describe,
+    # so a conditional GET costs one primary-key lookup
+    def __init__(self, model, collections: Dict[type, str]):
+        self.model = model
+        self.collections = collections
+        event.listen(Session, "before_flush", self._bump)
+
+    def _bump(self, session, flush_context, instances):
+        touched = set()
+        for obj in chain(session.new, session.dirty, session.deleted):
+            collection = self.collections.get(type(obj))
+            if collection is not None and (obj not in session.dirty or session.is_modified(obj)):
+                touched.add((obj.user_id, collection))
+        if touched:
+            self.touch(session, touched)
+
+    def touch(self, session, touched: Set[Tuple[str, str]]):
+        # Also called directly by Core-level writes (upserts) that bypass the flush
+        table = self.model.__table__
+        connection = session.connection()
+        now = datetime.now(timezone.utc)
+        for user_id, collection in sorted(touched):
+            connection.execute(
+                insert_for(connection, table)
+                .values(user_id=user_id, collection=collection, version=1, updated_at=now)
+                .on_conflict_do_update(index_elements=["user_id", "collection"], set_={"version": table.c.version + 1, "updated_at": now})
+            )
+
+    def versions(self, db, user_id: str, collections: Sequence[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        # Rows written before versioning existed are stable at version 0 until their first change
+        rows = {collection: (version, updated_at) for collection, version, updated_at in db.query(
+            self.model.collection, self.model.version, self.model.updated_at
+        ).filter(self.model.user_id == user_id, self.model.collection.in_(collections))}
+        return {collection: rows.get(collection, (0, None)) for collection in collections}
+
+    def conditional(self, db, user_id: str, collections: Sequence[str], request: Request, response: Response, variant: str = "") -> Dict[str, int]:
+        versions = self.versions(db, user_id, collections)
+        # Versions are per user and the body depends on the query, so both are folded into the tag:
+        # neither another user's tag nor another representation's can produce a 304
+        scope = hashlib.sha1(f"{user_id}|{variant}".encode("utf-8")).hexdigest()[:12]
+        tag = ".".join(f"{collection}-{version}" for collection, (version, _) in versions.items()) + f"-{scope}"
+        stamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+        updated_at = max(stamps) if stamps else None
+        headers = {"ETag": f'"{tag}"', "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+        if updated_at is not None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc, microsecond=0) if updated_at.tzinfo is None else updated_at.astimezone(timezone.utc).replace(microsecond=0)
+            headers["Last-Modified"] = format_datetime(updated_at, usegmt=True)
+        response.headers.update(headers)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers["ETag"])
+        else:
+            not_modified = updated_at is not None and self._not_modified_since(request.headers.get("if-modified-since"), updated_at)
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+        return {collection: version for collection, (version, _) in versions.items()}
+
+    @staticmethod
+    def _not_modified_since(header: Optional[str], updated_at: datetime) -> bool:
+        if not header:
+            return False
+        try:
+            since = parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            return False
+        return since.tzinfo is not None and updated_at <= since
@@ -0,0 +1,50 @@
+from pathlib import Path
+from typing import Any, Dict, Tuple
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> Tuple[Dict[str, Any], Dict[tuple, Dict[str, Any]]]:
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return report["meta"], {(r["scenario"], r["mode"], r["size"]): r for r in report["results"]}
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports and fail on regressions.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative p95 increase or rps drop (default 0.10)")
+    args = parser.parse_args(argv)
+
+    base_meta, baseline = load(args.baseline)
+    cand_meta, candidate = load(args.candidate)
+    print(f"baseline  {base_meta.get('commit')}  {base_meta.get('database')}  {base_meta.get('env')}")
+    print(f"candidate {cand_meta.get('commit')}  {cand_meta.get('database')}  {cand_meta.get('env')}")
+    print(f"{'scenario':<15} {'mode':<9} {'size':>7} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17} {'rps':>17}")
+    regressions = []
+    for key in sorted(baseline.keys() & candidate.keys(), key=lambda k: (k[2], k[1], k[0])):
+        before, after = baseline[key], candidate[key]
+        cells = []
+        for name in ("p50", "p95", "p99"):
+            old, new = before["latency_ms"][name], after["latency_ms"][name]
+            cells.append(f"{new:>8.2f} ({change(old, new):+6.1%})")
+        cells.append(f"{after['rps']:>8.1f} ({change(before['rps'], after['rps']):+6.1%})")
+        print(f"{key[0]:<15} {key[1]:<9} {key[2]:>7} " + " ".join(cells))
+        if change(before["latency_ms"]["p95"], after["latency_ms"]["p95"]) > args.threshold or change(before["rps"], after["rps"]) < -args.threshold:
+            regressions.append(key)
+        if after["errors"] > before["errors"]:
+            regressions.append(key)
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{key[0]:<15} {key[1]:<9} {key[2]:>7} only in {'baseline' if key in baseline else 'candidate'}")
+    if regressions:
+        print(f"{len(set(regressions))} regression(s) beyond {args.threshold:.0%}: " + ", ".join(f"{s}/{m}/{n}" for s, m, n in sorted(set(regressions))))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+from collections import Counter
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import httpx
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "backend"
+SCENARIOS = ("login", "goals", "analytics", "habit_complete")
+MODES = ("inprocess", "http")
+# Settings that change what is being measured, recorded with every run
+RECORDED_ENV = ("DB_ASYNC", "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "BCRYPT_ROUNDS", "HASH_POOL_WORKERS", "READ_CACHE_BACKEND", "READ_CACHE_TTL")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Seed synthetic users and measure latency and throughput of the hot API endpoints.",
+        epilog="Server settings (DB_ASYNC, READ_CACHE_BACKEND, BCRYPT_ROUNDS, ...) are read from the environment and recorded in the output.",
+    )
+    parser.add_argument("--database-url", help="database to seed and benchmark (default: a throwaway SQLite file)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="journal entries per seeded user, comma separated")
+    parser.add_argument("--modes", default=",".join(MODES), help="inprocess (ASGI transport) and/or http (uvicorn subprocess)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=30, help="measured requests for login, which is bcrypt-bound")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--habits", type=int, default=10, help="habits per user, each with --history-days of completions")
+    parser.add_argument("--goals", type=int, default=50)
+    parser.add_argument("--history-days", type=int, default=3 * 365)
+    parser.add_argument("--http-workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank, so a reported p99 is a latency that was actually observed
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    values = sorted(seconds * 1000 for seconds in latencies)
+    return {
+        "requests": len(values),
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 50), 3), "p95": round(percentile(values, 95), 3), "p99": round(percentile(values, 99), 3),
+            "mean": round(sum(values) / len(values), 3) if values else 0.0, "max": round(values[-1], 3) if values else 0.0,
+        },
+    }
+
+
+async def drive(client, make_request: Callable[[int], tuple], requests: int, concurrency: int, offset: int = 0):
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    indexes = iter(range(offset, offset + requests))
+
+    async def worker():
+        # Workers share one iterator, so exactly `requests` requests are sent however they interleave
+        for index in indexes:
+            method, url, kwargs = make_request(index)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def scenario_requests(name: str, user, pool: List[str]) -> Callable[[int], tuple]:
+    auth = {"headers": {"Authorization": f"Bearer {user.token}"}}
+    if name == "login":
+        return lambda i: ("POST", "/api/auth/login", {"json": {"email": user.email, "password": user.password}})
+    if name == "goals":
+        return lambda i: ("GET", "/api/goals", auth)
+    if name == "analytics":
+        return lambda i: ("GET", "/api/analytics/overview", auth)
+    if name == "habit_complete":
+        # Every request completes a different habit, so each one is a real write that extends a long streak
+        return lambda i: ("POST", f"/api/habits/{pool[i % len(pool)]}/complete", auth)
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+async def run_scenarios(server, client, mode: str, size: int, user, args) -> List[Dict[str, Any]]:
+    from seed import add_habits, remove_habits
+
+    results = []
+    for name in args.scenarios:
+        requests = args.login_requests if name == "login" else args.requests
+        pool: List[str] = []
+        if name == "habit_complete":
+            db = server.SessionLocal()
+            try:
+                pool = add_habits(server, db, random.Random(f"{args.seed}:{size}:{mode}"), user.user_id, requests + args.warmup, args.history_days, date.today())
+            finally:
+                db.close()
+        make_request = scenario_requests(name, user, pool)
+        await drive(client, make_request, args.warmup, args.concurrency)
+        latencies, statuses, elapsed = await drive(client, make_request, requests, args.concurrency, offset=args.warmup)
+        if pool:
+            remove_habits(server, pool)
+        result = {"scenario": name, "mode": mode, "size": size, "concurrency": args.concurrency, **summarize(latencies, statuses, elapsed)}
+        log(f"{mode:>9} size={size:<7} {name:<15} p50={result['latency_ms']['p50']:>9.2f}ms p95={result['latency_ms']['p95']:>9.2f}ms "
+            f"p99={result['latency_ms']['p99']:>9.2f}ms rps={result['rps']:>8.1f} errors={result['errors']}")
+        results.append(result)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_http_server(database_url: str, workers: int):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, "DATABASE_URL": database_url},
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                return process, f"http://127.0.0.1:{port}"
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60s")
+
+
+def stop_http_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+async def benchmark(args) -> Dict[str, Any]:
+    import server
+    from seed import seed_user
+
+    # server configures INFO logging at import; per-request client logs would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    server.migrate()
+    password = "benchmark-password"
+    password_hash = server.hash_password(password)
+    results = []
+    for size in args.sizes:
+        db = server.SessionLocal()
+        try:
+            start = time.perf_counter()
+            user = seed_user(server, db, str(size), password_hash, password, size, args.habits, args.goals, args.history_days, args.seed)
+            log(f"seeded user with {size} journal entries in {time.perf_counter() - start:.1f}s")
+        finally:
+            db.close()
+        for mode in args.modes:
+            if mode == "inprocess":
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://benchmark", timeout=120) as client:
+                    results.extend(await run_scenarios(server, client, mode, size, user, args))
+            else:
+                process, base_url = start_http_server(args.database_url, args.http_workers)
+                try:
+                    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+                    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+                        results.extend(await run_scenarios(server, client, mode, size, user, args))
+                finally:
+                    stop_http_server(process)
+    return {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "database": server.engine.dialect.name,
+            "env": {name: os.environ.get(name) for name in RECORDED_ENV},
+            "args": {key: value for key, value in vars(args).items() if key not in ("database_url", "output")},
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.modes = [mode for mode in args.modes.split(",") if mode]
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+    for mode in args.modes:
+        if mode not in MODES:
+            raise SystemExit(f"Unknown mode: {mode}")
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {name}")
+    scratch: Optional[str] = None
+    if not args.database_url:
+        scratch = tempfile.mkdtemp(prefix="growth-bench-")
+        args.database_url = f"sqlite:///{scratch}/bench.db"
+    # server reads its configuration at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.path[:0] = [str(BACKEND_DIR), str(Path(__file__).resolve().parent)]
+    try:
+        report = asyncio.run(benchmark(args))
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+    body = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(body + "\n", encoding="utf-8")
+        log(f"wrote {args.output}")
+    else:
+        print(body)
+
+
+if __name__ == "__main__":
+    main()
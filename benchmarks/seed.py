@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import delete, insert
+from typing import Any, Dict, List, NamedTuple
+import random
+import uuid
+
+from streaks import replay
+
+WORDS = (
+    "discipline focus gratitude habit morning run read write calm patience courage progress setback "
+    "identity growth plan reflect energy sleep walk family work learn practice breathe stoic virtue"
+).split()
+CHUNK = 5000
+
+
+class SeededUser(NamedTuple):
+    user_id: str
+    email: str
+    password: str
+    token: str
+    habit_ids: List[str]
+
+
+def bulk_insert(db, model, rows: List[Dict[str, Any]]):
+    # Core executemany keeps seeding 100k+ rows to seconds; ORM events (versions, tombstones) are not needed here
+    for start in range(0, len(rows), CHUNK):
+        db.execute(insert(model.__table__), rows[start:start + CHUNK])
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def completion_history(rng: random.Random, today: date, days: int) -> List[date]:
+    # Mostly consistent with occasional misses, ending yesterday so completing today extends a streak
+    return [today - timedelta(days=offset) for offset in range(days, 0, -1) if rng.random() > 0.1]
+
+
+def add_habits(server, db, rng: random.Random, user_id: str, count: int, history_days: int, today: date) -> List[str]:
+    now = datetime.now(timezone.utc)
+    habits, completions = [], []
+    for index in range(count):
+        habit_id = str(uuid.uuid4())
+        days = completion_history(rng, today, history_days)
+        state = replay(days)
+        habits.append({
+            "id": habit_id, "user_id": user_id, "name": f"Habit {index}", "description": sentence(rng, 6), "frequency": "daily",
+            "streak": state.current, "best_streak": state.best, "last_completed": state.last_date.isoformat() if state.last_date else None,
+            "completion_dates": [], "created_at": now - timedelta(days=history_days), "updated_at": now,
+        })
+        completions.extend(
+            {"id": str(uuid.uuid4()), "habit_id": habit_id, "user_id": user_id, "date": day.isoformat(), "created_at": now}
+            for day in days
+        )
+    bulk_insert(db, server.HabitDB, habits)
+    bulk_insert(db, server.HabitCompletionDB, completions)
+    db.commit()
+    return [habit["id"] for habit in habits]
+
+
+def seed_user(server, db, label: str, password_hash: str, password: str, journal_entries: int, habits: int, goals: int, history_days: int, seed: int) -> SeededUser:
+    rng = random.Random(f"{seed}:{label}")
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    user_id = str(uuid.uuid4())
+    email = f"bench-{label}-{user_id[:8]}@example.com"
+    bulk_insert(db, server.UserDB, [{"id": user_id, "email": email, "name": f"Bench {label}", "password_hash": password_hash, "wisdom_notifications": False, "created_at": now}])
+    bulk_insert(db, server.GoalDB, [{
+        "id": str(uuid.uuid4()), "user_id": user_id, "title": sentence(rng, 4), "description": sentence(rng, 20),
+        "category": "personal", "principle": "atomic_habits", "why": sentence(rng, 10), "target_date": None,
+        "milestones": [{"title": sentence(rng, 3), "completed": rng.random() < 0.5} for _ in range(5)],
+        "status": "active", "progress": 0, "created_at": now - timedelta(minutes=index), "updated_at": now,
+    } for index in range(goals)])
+    journal = []
+    for index in range(journal_entries):
+        day = today - timedelta(days=index * history_days // max(journal_entries, 1))
+        created = datetime.combine(day, datetime.min.time(), timezone.utc) + timedelta(seconds=index % 86400)
+        journal.append({
+            "id": str(uuid.uuid4()), "user_id": user_id, "content": sentence(rng, rng.randint(20, 80)), "mood": rng.choice(["good", "ok", "low"]),
+            "gratitude": [sentence(rng, 4)], "date": day.isoformat(), "created_at": created, "updated_at": created,
+        })
+    bulk_insert(db, server.JournalEntryDB, journal)
+    db.commit()
+    habit_ids = add_habits(server, db, rng, user_id, habits, history_days, today)
+    return SeededUser(user_id, email, password, server.create_token(user_id), habit_ids)
+
+
+def remove_habits(server, habit_ids: List[str]):
+    # Write scenarios add their own habits; dropping them keeps later read scenarios comparable
+    db = server.SessionLocal()
+    try:
+        for start in range(0, len(habit_ids), CHUNK):
+            chunk = habit_ids[start:start + CHUNK]
+            db.execute(delete(server.HabitCompletionDB.__table__).where(server.HabitCompletionDB.habit_id.in_(chunk)))
+            db.execute(delete(server.HabitDB.__table__).where(server.HabitDB.id.in_(chunk)))
+        db.commit()
+    finally:
+        db.close()
@@ -174,6 +174,30 @@ export const apiDelete = async (endpoint, token, options = {}) => {
   }
 };
 
+/**
+ * GET one page of a cursor-paginated list.
+ * The server returns at most `limit` items and an X-Next-Cursor header while more remain.
+ */
+export const apiGetPage = async (endpoint, token, { cursor, limit } = {}) => {
+  const api = createAxiosInstance(token);
+  const response = await api.get(endpoint, { params: { limit, cursor } });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
+/**
+ * GET every page of a cursor-paginated list, for views that need the whole history
+ */
+export const apiGetAllPages = async (endpoint, token) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const page = await apiGetPage(endpoint, token, { cursor, limit: 200 });
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return items;
+};
+
 /**
  * Hook-like pattern for managing API state
  * Usage: const { execute, loading, error } = useApiCall(apiFunction);
@@ -12,6 +12,7 @@ import {
 } from 'lucide-react';
 import axios from 'axios';
 import { toast } from 'sonner';
+import { apiGetAllPages } from '@/lib/api';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -127,14 +128,12 @@ const Exercises = ({ token }) => {
 
   const fetchExercises = async () => {
     try {
-      const response = await axios.get(`${API}/exercises`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setExercises(response.data);
+      const allExercises = await apiGetAllPages('/exercises', token);
+      setExercises(allExercises);
       
       // Check which exercises were completed today
       const today = new Date().toISOString().split('T')[0];
-      const todayExercises = response.data
+      const todayExercises = allExercises
         .filter(e => e.date?.startsWith(today))
         .map(e => e.exercise_type);
       setCompletedToday(new Set(todayExercises));
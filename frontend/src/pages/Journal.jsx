@@ -13,6 +13,7 @@ import {
 } from 'lucide-react';
 import axios from 'axios';
 import { toast } from 'sonner';
+import { apiGetPage } from '@/lib/api';
 import PhilosophyIcon from '@/components/PhilosophyIcon';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -78,6 +79,8 @@ const itemVariants = {
 
 const Journal = ({ token }) => {
   const [entries, setEntries] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [expandedEntry, setExpandedEntry] = useState(null);
@@ -96,10 +99,9 @@ const Journal = ({ token }) => {
 
   const fetchEntries = async () => {
     try {
-      const response = await axios.get(`${API}/journal`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setEntries(response.data);
+      const page = await apiGetPage('/journal', token);
+      setEntries(page.items);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       toast.error('Failed to load journal');
     } finally {
@@ -107,6 +109,19 @@ const Journal = ({ token }) => {
     }
   };
 
+  const loadMoreEntries = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await apiGetPage('/journal', token, { cursor: nextCursor });
+      setEntries(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      toast.error('Failed to load older entries');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     if (!formData.content.trim()) {
@@ -394,7 +409,7 @@ const Journal = ({ token }) => {
       {entries.length > 0 && (
         <motion.div variants={itemVariants} className="grid grid-cols-2 lg:grid-cols-4 gap-4">
           {[
-            { label: 'Total Entries', value: totalEntries, icon: BookOpen, color: 'text-purple-400' },
+            { label: 'Total Entries', value: nextCursor ? `${totalEntries}+` : totalEntries, icon: BookOpen, color: 'text-purple-400' },
             { label: 'This Month', value: thisMonthEntries, icon: Calendar, color: 'text-blue-400' },
             { label: 'Current Streak', value: `${streak} days`, icon: Flame, color: 'text-orange-400' },
             { label: 'Gratitude Items', value: totalGratitude, icon: Heart, color: 'text-pink-400' },
@@ -540,6 +555,19 @@ const Journal = ({ token }) => {
               </div>
             </motion.div>
           ))}
+          {nextCursor && (
+            <div className="flex justify-center">
+              <Button
+                variant="outline"
+                onClick={loadMoreEntries}
+                disabled={loadingMore}
+                className="border-[#d4a574]/20 text-gray-300"
+                data-testid="journal-load-more"
+              >
+                {loadingMore ? 'Loading...' : 'Load older entries'}
+              </Button>
+            </div>
+          )}
         </motion.div>
       )}
 
@@ -8,6 +8,7 @@ import {
 } from 'lucide-react';
 import axios from 'axios';
 import { toast } from 'sonner';
+import { apiGetAllPages } from '@/lib/api';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -38,8 +39,8 @@ const TransformationTimeline = ({ token }) => {
       const [goalsRes, habitsRes, journalRes, exercisesRes] = await Promise.all([
         axios.get(`${API}/goals`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/habits`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API}/journal`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API}/exercises`, { headers: { Authorization: `Bearer ${token}` } })
+        apiGetAllPages('/journal', token).then(data => ({ data })),
+        apiGetAllPages('/exercises', token).then(data => ({ data }))
       ]);
 
       // Group events by month
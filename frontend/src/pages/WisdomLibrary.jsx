@@ -9,6 +9,7 @@ import {
 import { Input } from '@/components/ui/input';
 import axios from 'axios';
 import { toast } from 'sonner';
+import { apiGetAllPages } from '@/lib/api';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -92,10 +93,8 @@ const WisdomLibrary = ({ token }) => {
 
   const fetchFavorites = async () => {
     try {
-      const response = await axios.get(`${API}/wisdom/favorites`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setFavorites(response.data.map(f => f.quote_id));
+      const allFavorites = await apiGetAllPages('/wisdom/favorites', token);
+      setFavorites(allFavorites.map(f => f.quote_id));
     } catch (error) {
       console.error('Failed to fetch favorites');
     }
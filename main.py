@@ -1,5 +1,139 @@
-def main():
-    print("Hello from repl-nix-workspace!")
+from dotenv import load_dotenv
+from pathlib import Path
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+# The backend modules import each other by top-level name, so the app is loaded as `server:app` from backend/
+APP = "server:app"
+
+load_dotenv(BACKEND_DIR / ".env")
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("launcher")
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def available_cpus() -> int:
+    # os.cpu_count() reports the host; containers are limited by affinity and the cgroup CPU quota
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            count = min(count, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, count)
+
+
+def installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Growth API with a production worker setup.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=env_int("PORT", 8000))
+    parser.add_argument("--workers", type=int, default=env_int("WEB_CONCURRENCY", 0), help="defaults to WEB_CONCURRENCY, then the number of usable CPUs")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "uvicorn"), default=os.environ.get("APP_SERVER", "auto"),
+                        help="gunicorn preloads the app and forks workers from it; uvicorn starts each worker fresh")
+    parser.add_argument("--migrate", action="store_true", help="apply schema migrations once before starting the workers")
+    parser.add_argument("--reload", action="store_true", help="development only: single worker, restarts on code changes")
+    parser.add_argument("--keep-alive", type=int, default=env_int("KEEP_ALIVE", 65),
+                        help="seconds an idle connection is kept open; keep above the proxy's idle timeout")
+    parser.add_argument("--graceful-timeout", type=int, default=env_int("GRACEFUL_TIMEOUT", 30), help="seconds in-flight requests get to finish on shutdown")
+    parser.add_argument("--timeout", type=int, default=env_int("WORKER_TIMEOUT", 60), help="gunicorn: restart a worker that is silent this long")
+    parser.add_argument("--max-requests", type=int, default=env_int("MAX_REQUESTS", 0), help="recycle a worker after this many requests (0: never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=env_int("MAX_REQUESTS_JITTER", 0))
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def configure_shared_state(workers: int):
+    # server defaults to per-process stores; once requests are spread over workers, coach conversations
+    # must live in the database. Runs before anything imports server, which reads these at import time
+    if workers < 2:
+        return
+    if os.environ.get("COACH_SESSION_BACKEND") == "memory":
+        raise SystemExit(f"COACH_SESSION_BACKEND=memory loses coach conversations across {workers} workers; use database or --workers 1")
+    os.environ.setdefault("COACH_SESSION_BACKEND", "database")
+    # The read cache is keyed on committed versions, so a per-worker memory cache is still coherent; it is
+    # only replaced by default because a shared Redis (when configured) gives every worker the same hits
+    os.environ.setdefault("READ_CACHE_BACKEND", "redis" if os.environ.get("READ_CACHE_URL") else "none")
+    logger.info(f"{workers} workers: COACH_SESSION_BACKEND={os.environ['COACH_SESSION_BACKEND']}, READ_CACHE_BACKEND={os.environ['READ_CACHE_BACKEND']}")
+
+
+def run_gunicorn(args, workers: int):
+    from gunicorn.app.base import BaseApplication
+
+    worker_class = "uvicorn_worker.UvicornWorker" if installed("uvicorn_worker") else "uvicorn.workers.UvicornWorker"
+
+    def post_fork(arbiter, worker):
+        # os.register_at_fork covers this too; kept explicit so the guarantee doesn't depend on the platform
+        import server
+        server.dispose_engines_after_fork()
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                "bind": f"{args.host}:{args.port}", "workers": workers, "worker_class": worker_class,
+                "preload_app": True, "keepalive": args.keep_alive, "graceful_timeout": args.graceful_timeout, "timeout": args.timeout,
+                "max_requests": args.max_requests, "max_requests_jitter": args.max_requests_jitter,
+                "loglevel": args.log_level, "accesslog": "-", "post_fork": post_fork,
+                "forwarded_allow_ips": os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+            }.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import server
+            return server.app
+
+    Application().run()
+
+
+def run_uvicorn(args, workers: int):
+    import uvicorn
+
+    uvicorn.run(
+        APP, host=args.host, port=args.port, workers=None if args.reload else workers, reload=args.reload,
+        reload_dirs=[str(BACKEND_DIR)] if args.reload else None,
+        loop="auto", http="auto", log_level=args.log_level,
+        timeout_keep_alive=args.keep_alive, timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+        proxy_headers=True, forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, str(BACKEND_DIR))
+    workers = 1 if args.reload else args.workers or available_cpus()
+    server_name = args.server
+    if server_name == "auto":
+        server_name = "gunicorn" if installed("gunicorn") and not args.reload and os.name == "posix" else "uvicorn"
+    configure_shared_state(workers)
+    if args.migrate:
+        import migrate
+        migrate.main(["upgrade"])
+        # Workers open their own pools; don't keep the migration connection idle in the parent
+        migrate.server.engine.dispose()
+    # loop="auto" / http="auto" pick these up when installed
+    loop = "uvloop" if installed("uvloop") else "asyncio"
+    http = "httptools" if installed("httptools") else "h11"
+    logger.info(f"Starting {server_name} with {workers} worker(s) on {args.host}:{args.port} (loop={loop}, http={http})")
+    if server_name == "gunicorn":
+        run_gunicorn(args, workers)
+    else:
+        run_uvicorn(args, workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+from pathlib import Path
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server reads its configuration at import time; never point the suite at a real database
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp(prefix='growth-tests-')}/test.db"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+@pytest.fixture(scope="session")
+def server():
+    import server
+    server.migrate()
+    return server
+
+
+@pytest.fixture
+def client(server):
+    from fastapi.testclient import TestClient
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture
+def register(client):
+    def register(name: str = "Test") -> dict:
+        response = client.post("/api/auth/register", json={"email": f"{uuid.uuid4().hex[:12]}@example.com", "password": "password", "name": name})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+    return register
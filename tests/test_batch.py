@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from streaks import local_today
+
+
+def test_batch_results_match_single_call_responses(client, register):
+    headers = register()
+    operation = {"op": "journal.create", "idempotency_key": "entry-1", "data": {"content": "Offline entry", "mood": "calm"}}
+    fresh = client.post("/api/batch", json={"operations": [operation]}, headers=headers).json()["results"][0]
+    assert fresh["status"] == 200
+    single = client.post("/api/journal", json={"content": "Online entry", "mood": "calm"}, headers=headers).json()
+    listed = {entry["id"]: entry for entry in client.get("/api/journal", headers=headers).json()}
+    assert fresh["result"] == listed[fresh["result"]["id"]]
+    assert single == listed[single["id"]]
+
+    replayed = client.post("/api/batch", json={"operations": [operation]}, headers=headers).json()["results"][0]
+    assert replayed["replayed"] is True
+    assert replayed["result"] == fresh["result"]
+
+
+def test_failed_operation_only_drops_itself(client, register):
+    headers = register()
+    results = client.post("/api/batch", json={"operations": [
+        {"op": "habit.complete", "data": {"habit_id": "missing"}},
+        {"op": "journal.create", "data": {"content": "Still saved"}},
+        {"op": "unknown.op"},
+    ]}, headers=headers).json()["results"]
+    assert [result["status"] for result in results] == [404, 200, 400]
+    assert [entry["content"] for entry in client.get("/api/journal", headers=headers).json()] == ["Still saved"]
+
+
+def test_backdated_completion_rebuilds_the_streak(client, register):
+    headers = register()
+    habit = client.post("/api/habits", json={"name": "Read", "description": ""}, headers=headers).json()
+    today = local_today()
+
+    def complete(day):
+        operation = {"op": "habit.complete", "data": {"habit_id": habit["id"], "date": day.isoformat()}}
+        return client.post("/api/batch", json={"operations": [operation]}, headers=headers).json()["results"][0]
+
+    assert complete(today - timedelta(days=2))["result"]["streak"] == 1
+    assert complete(today)["result"]["streak"] == 1
+    # The missing day arrives late and bridges the gap
+    assert complete(today - timedelta(days=1))["result"]["streak"] == 3
+    assert complete(today - timedelta(days=1))["result"]["streak"] == 3
+    assert complete(today + timedelta(days=1))["status"] == 400
+
+    listed = client.get("/api/habits", params={"fields": "id,streak,best_streak,last_completed"}, headers=headers).json()
+    assert listed == [{"id": habit["id"], "streak": 3, "best_streak": 3, "last_completed": today.isoformat()}]
+
+
+def test_backdated_journal_entry_rebuilds_the_streak(client, register):
+    headers = register()
+    today = local_today()
+
+    def write(day):
+        operation = {"op": "journal.create", "data": {"content": "Offline entry", "date": day.isoformat()}}
+        return client.post("/api/batch", json={"operations": [operation]}, headers=headers).json()["results"][0]
+
+    for days_ago in (2, 0, 1, 1):
+        assert write(today - timedelta(days=days_ago))["status"] == 200
+    assert client.get("/api/analytics/overview", headers=headers).json()["journal"]["current_streak"] == 3
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from coach import CoachProvider
+
+
+class FakeProvider(CoachProvider):
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, mentor, prompt, history=None):
+        self.calls.append((mentor, prompt, list(history or [])))
+        return f"{mentor} reply #{len(self.calls)}"
+
+    async def stream(self, mentor, prompt, history=None):
+        reply = await self.generate(mentor, prompt, history)
+        for word in reply.split(" "):
+            yield word + " "
+
+
+@pytest.fixture
+def provider(server):
+    provider = FakeProvider()
+    server.app.dependency_overrides[server.get_coach_provider] = lambda: provider
+    server.coach_cache.clear()
+    yield provider
+    server.app.dependency_overrides.pop(server.get_coach_provider, None)
+
+
+def stream_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+
+def test_provider_must_implement_generate():
+    class Incomplete(CoachProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_reply_and_follow_up_carry_history(client, register, provider):
+    headers = register()
+    first = client.post("/api/ai-coach", json={"message": "How do I start?", "context": {"mentor_personality": "clear"}}, headers=headers)
+    assert first.status_code == 200, first.text
+    body = first.json()
+    assert body["response"] == "clear reply #1"
+    mentor, prompt, history = provider.calls[0]
+    assert mentor == "clear" and prompt.endswith("How do I start?") and history == []
+
+    follow_up = client.post("/api/ai-coach", json={"message": "And then?", "context": {"mentor_personality": "clear", "session_id": body["session_id"]}}, headers=headers)
+    assert follow_up.json()["session_id"] == body["session_id"]
+    assert provider.calls[1][2] == [{"role": "user", "text": "How do I start?"}, {"role": "model", "text": "clear reply #1"}]
+
+
+def test_stream_sends_chunks_then_done(client, register, provider):
+    headers = register()
+    response = client.post("/api/ai-coach/stream", json={"message": "Give me courage", "context": {"mentor_personality": "holiday"}}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = stream_events(response)
+    assert "".join(data["text"] for kind, data in events if kind == "message").strip() == "holiday reply #1"
+    kind, data = events[-1]
+    assert kind == "done" and data["session_id"]
+
+
+def test_opening_turns_are_served_from_cache(client, register, provider):
+    headers = register()
+    replies = [client.post("/api/ai-coach", json={"message": "Why persist?"}, headers=headers).json()["response"] for _ in range(2)]
+    assert replies == ["hill reply #1", "hill reply #1"]
+    assert len(provider.calls) == 1
+
+
+def test_missing_provider_is_an_error(client, register, server):
+    server.app.dependency_overrides[server.get_coach_provider] = lambda: None
+    try:
+        assert client.post("/api/ai-coach", json={"message": "Hello"}, headers=register()).status_code == 500
+    finally:
+        server.app.dependency_overrides.pop(server.get_coach_provider, None)
+
+
+@pytest.mark.parametrize("path", ["/api/ai-coach", "/api/ai-coach/stream"])
+def test_uncached_request_leaves_the_shared_reply_alone(client, register, provider, path):
+    message = {"message": "What matters most?"}
+    cached = client.post("/api/ai-coach", json=message, headers=register()).json()["response"]
+    client.post(path, json={**message, "use_cache": False}, headers=register())
+    assert len(provider.calls) == 2
+    assert client.post("/api/ai-coach", json=message, headers=register()).json()["response"] == cached
+    assert len(provider.calls) == 2
@@ -0,0 +1,50 @@
+import asyncio
+import uuid
+
+import pytest
+
+from coach_sessions import DatabaseSessionStore, MemorySessionStore, SessionStore, estimate_tokens, trim_history
+
+
+def turns(*texts):
+    return [{"role": "user" if index % 2 == 0 else "model", "text": text} for index, text in enumerate(texts)]
+
+
+def test_store_must_implement_load_and_save():
+    class LoadOnly(SessionStore):
+        async def load(self, user_id, session_id):
+            return []
+
+    with pytest.raises(TypeError):
+        LoadOnly()
+
+
+def test_trim_keeps_the_newest_turns_and_opens_with_a_user_turn():
+    history = turns("a" * 40, "b" * 40, "c" * 40, "d" * 40)
+    trimmed = trim_history(history, max_tokens=estimate_tokens("c" * 40) * 3)
+    # The three newest turns fit, but the oldest of them is a model turn and is dropped
+    assert trimmed == history[2:]
+    assert trim_history(history, max_tokens=1) == []
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request, server):
+    if request.param == "memory":
+        return MemorySessionStore(maxsize=10, ttl=60)
+    return DatabaseSessionStore(server.SessionLocal, server.CoachSessionDB)
+
+
+def test_history_round_trips_per_user(store):
+    session_id = str(uuid.uuid4())
+    history = turns("Where do I begin?", "With one small habit.")
+    asyncio.run(store.save("alice", session_id, "clear", history))
+    assert asyncio.run(store.load("alice", session_id)) == history
+    assert asyncio.run(store.load("bob", session_id)) == []
+
+
+def test_database_store_never_overwrites_another_users_session(server):
+    store = DatabaseSessionStore(server.SessionLocal, server.CoachSessionDB)
+    session_id = str(uuid.uuid4())
+    asyncio.run(store.save("alice", session_id, "hill", turns("mine")))
+    asyncio.run(store.save("mallory", session_id, "hill", turns("hijacked")))
+    assert asyncio.run(store.load("alice", session_id)) == turns("mine")
@@ -0,0 +1,29 @@
+def test_not_modified_until_a_write(client, register):
+    headers = register()
+    first = client.get("/api/goals", headers=headers)
+    assert first.status_code == 200
+    assert "Authorization" in first.headers["vary"]
+    etag = first.headers["etag"]
+    assert client.get("/api/goals", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.post("/api/goals", json={"title": "Run a marathon"}, headers=headers)
+    changed = client.get("/api/goals", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()) == 1
+
+
+def test_etag_is_scoped_to_the_user(client, register):
+    alice, bob = register("Alice"), register("Bob")
+    etag = client.get("/api/vision-board", headers=alice).headers["etag"]
+    response = client.get("/api/vision-board", headers={**bob, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_etag_is_scoped_to_the_representation(client, register):
+    headers = register()
+    full = client.get("/api/goals", headers=headers).headers["etag"]
+    sparse = client.get("/api/goals", params={"fields": "id"}, headers={**headers, "If-None-Match": full})
+    assert sparse.status_code == 200
+    assert sparse.headers["etag"] != full
@@ -0,0 +1,33 @@
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("COACH_SESSION_BACKEND", "READ_CACHE_BACKEND", "READ_CACHE_URL"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_single_worker_keeps_server_defaults(monkeypatch):
+    main.configure_shared_state(1)
+    assert "COACH_SESSION_BACKEND" not in main.os.environ
+    assert "READ_CACHE_BACKEND" not in main.os.environ
+
+
+def test_multiple_workers_share_state(monkeypatch):
+    main.configure_shared_state(4)
+    assert main.os.environ["COACH_SESSION_BACKEND"] == "database"
+    assert main.os.environ["READ_CACHE_BACKEND"] == "none"
+
+
+def test_multiple_workers_use_configured_redis(monkeypatch):
+    monkeypatch.setenv("READ_CACHE_URL", "redis://localhost:6379/0")
+    main.configure_shared_state(2)
+    assert main.os.environ["READ_CACHE_BACKEND"] == "redis"
+
+
+def test_memory_coach_sessions_refused_with_multiple_workers(monkeypatch):
+    monkeypatch.setenv("COACH_SESSION_BACKEND", "memory")
+    with pytest.raises(SystemExit):
+        main.configure_shared_state(2)
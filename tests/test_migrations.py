@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import JSON, Boolean, Column, DateTime, Integer, MetaData, String, Table, Text, create_engine, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from search import SEARCH_DOCUMENTS, search
+
+# Tables as they were before versioned migrations: no updated_at, no composite indexes, no unique favorites
+LEGACY = MetaData()
+
+Table(
+    "goals", LEGACY,
+    Column("id", String, primary_key=True), Column("user_id", String, nullable=False), Column("title", String, nullable=False),
+    Column("description", Text), Column("category", String), Column("principle", String), Column("why", Text),
+    Column("target_date", String), Column("milestones", JSON), Column("status", String), Column("progress", Integer),
+    Column("created_at", DateTime),
+)
+Table(
+    "habits", LEGACY,
+    Column("id", String, primary_key=True), Column("user_id", String, nullable=False), Column("name", String, nullable=False),
+    Column("description", Text), Column("frequency", String), Column("streak", Integer), Column("best_streak", Integer),
+    Column("last_completed", String), Column("completion_dates", JSON), Column("created_at", DateTime),
+)
+Table(
+    "journal", LEGACY,
+    Column("id", String, primary_key=True), Column("user_id", String, nullable=False), Column("content", Text, nullable=False),
+    Column("mood", String), Column("gratitude", JSON), Column("date", String, nullable=False), Column("created_at", DateTime),
+)
+Table(
+    "wisdom_favorites", LEGACY,
+    Column("id", String, primary_key=True), Column("user_id", String, nullable=False), Column("quote_id", String, nullable=False),
+    Column("created_at", DateTime),
+)
+Table(
+    "habit_chain_completions", LEGACY,
+    Column("id", String, primary_key=True), Column("user_id", String, nullable=False), Column("chain_id", String, nullable=False),
+    Column("success", Boolean, nullable=False), Column("date", String, nullable=False), Column("created_at", DateTime),
+)
+
+
+@pytest.fixture
+def legacy_engine(server, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    LEGACY.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def upgrade(server, legacy_engine):
+    from migrations import run_migrations
+
+    def upgrade(**rows):
+        with legacy_engine.begin() as connection:
+            for table_name, values in rows.items():
+                connection.execute(LEGACY.tables[table_name].insert(), values)
+        return run_migrations(legacy_engine, server.Base.metadata)
+    return upgrade
+
+
+def test_runner_applies_each_migration_once(server, legacy_engine, upgrade):
+    from migrations import MIGRATIONS, migration_status, run_migrations
+
+    assert all(applied_at is None for _, _, applied_at in migration_status(legacy_engine))
+    applied = upgrade()
+    assert [version for version, _ in applied] == sorted(version for version, _, _ in MIGRATIONS)
+    assert all(applied_at is not None for _, _, applied_at in migration_status(legacy_engine))
+    assert run_migrations(legacy_engine, server.Base.metadata) == []
+    # Tables the legacy schema never had are created from the models
+    assert inspect(legacy_engine).has_table("habit_completions")
+
+
+def test_user_indexes_are_added_to_existing_tables(legacy_engine, upgrade):
+    from migrations import USER_INDEXES
+
+    upgrade()
+    inspector = inspect(legacy_engine)
+    for table_name in LEGACY.tables:
+        indexes = {ix["name"]: tuple(ix["column_names"]) for ix in inspector.get_indexes(table_name)}
+        for _, index_name, columns in (entry for entry in USER_INDEXES if entry[0] == table_name):
+            if index_name == "ix_wisdom_favorites_user_quote":
+                # Superseded by the unique index in migration 5
+                continue
+            assert indexes.get(index_name) == columns, (table_name, index_name)
+
+
+def test_completion_dates_are_backfilled_once_per_day(legacy_engine, upgrade):
+    upgrade(habits=[
+        {"id": "h1", "user_id": "u1", "name": "Read", "completion_dates": ["2024-03-01", "2024-03-02", "2024-03-02"]},
+        {"id": "h2", "user_id": "u2", "name": "Walk", "completion_dates": []},
+        {"id": "h3", "user_id": "u2", "name": "Write", "completion_dates": None},
+    ])
+    completions = Table("habit_completions", MetaData(), autoload_with=legacy_engine)
+    with legacy_engine.connect() as connection:
+        rows = connection.execute(
+            select(completions.c.habit_id, completions.c.user_id, completions.c.date).order_by(completions.c.date)
+        ).all()
+    assert [tuple(row) for row in rows] == [("h1", "u1", "2024-03-01"), ("h1", "u1", "2024-03-02")]
+
+
+def test_streaks_are_replayed_from_journal_and_chain_history(legacy_engine, upgrade):
+    def entry(entry_id, day):
+        return {"id": entry_id, "user_id": "u1", "content": "entry", "date": day}
+
+    def attempt(attempt_id, day, success, hour=9):
+        return {"id": attempt_id, "user_id": "u1", "chain_id": "c1", "success": success, "date": day,
+                "created_at": datetime.fromisoformat(f"{day}T{hour:02d}:00").replace(tzinfo=timezone.utc)}
+
+    upgrade(
+        # Two entries on one day count once; the gap before 05-05 restarts the streak
+        journal=[entry("j1", "2024-05-01"), entry("j2", "2024-05-02"), entry("j3", "2024-05-02"), entry("j4", "2024-05-03"), entry("j5", "2024-05-05")],
+        habit_chain_completions=[
+            attempt("a1", "2024-05-01", True), attempt("a2", "2024-05-02", True),
+            # A failure later on the same day wins, since attempts replay in the order they were logged
+            attempt("a3", "2024-05-03", True), attempt("a4", "2024-05-03", False, hour=20),
+        ],
+    )
+    streaks = Table("streaks", MetaData(), autoload_with=legacy_engine)
+    with legacy_engine.connect() as connection:
+        rows = connection.execute(select(
+            streaks.c.entity_type, streaks.c.entity_id, streaks.c.current_streak, streaks.c.best_streak, streaks.c.last_date
+        ).where(streaks.c.user_id == "u1")).all()
+    assert sorted(tuple(row) for row in rows) == [
+        ("habit_chain", "c1", 0, 3, "2024-05-03"),
+        ("journal", "u1", 1, 3, "2024-05-05"),
+    ]
+
+
+def test_sync_watermarks_are_seeded_from_created_at(legacy_engine, upgrade):
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    upgrade(goals=[{"id": "g1", "user_id": "u1", "title": "Run", "created_at": created}])
+    inspector = inspect(legacy_engine)
+    assert "updated_at" in {column["name"] for column in inspector.get_columns("goals")}
+    assert "ix_goals_user_updated" in {ix["name"] for ix in inspector.get_indexes("goals")}
+    goals = Table("goals", MetaData(), autoload_with=legacy_engine)
+    with legacy_engine.connect() as connection:
+        assert connection.execute(select(goals.c.updated_at).where(goals.c.id == "g1")).scalar_one() == created
+
+
+def test_duplicate_favorites_become_tombstones(legacy_engine, upgrade):
+    def favorite(favorite_id, user_id, quote_id, day):
+        return {"id": favorite_id, "user_id": user_id, "quote_id": quote_id, "created_at": datetime.fromisoformat(day)}
+
+    upgrade(wisdom_favorites=[
+        favorite("f2", "u1", "q1", "2024-01-02"), favorite("f1", "u1", "q1", "2024-01-01"), favorite("f3", "u1", "q1", "2024-01-03"),
+        favorite("f4", "u1", "q2", "2024-01-01"), favorite("f5", "u2", "q1", "2024-01-01"),
+    ])
+    favorites = Table("wisdom_favorites", MetaData(), autoload_with=legacy_engine)
+    tombstones = Table("tombstones", MetaData(), autoload_with=legacy_engine)
+    with legacy_engine.connect() as connection:
+        # The earliest favorite survives
+        assert sorted(connection.execute(select(favorites.c.id)).scalars()) == ["f1", "f4", "f5"]
+        assert sorted(tuple(row) for row in connection.execute(select(tombstones.c.user_id, tombstones.c.collection, tombstones.c.row_id))) == [
+            ("u1", "wisdom_favorites", "f2"), ("u1", "wisdom_favorites", "f3"),
+        ]
+    indexes = {ix["name"]: ix for ix in inspect(legacy_engine).get_indexes("wisdom_favorites")}
+    assert indexes["uq_wisdom_favorites_user_quote"]["unique"]
+    assert "ix_wisdom_favorites_user_quote" not in indexes
+    with pytest.raises(IntegrityError), legacy_engine.begin() as connection:
+        connection.execute(favorites.insert(), favorite("f6", "u1", "q1", "2024-01-04"))
+
+
+def test_search_index_covers_existing_and_new_rows(legacy_engine, upgrade):
+    upgrade(journal=[{"id": "j1", "user_id": "u1", "content": "An old entry about gratitude", "date": "2024-01-01"}])
+    journal = Table("journal", MetaData(), autoload_with=legacy_engine)
+    with legacy_engine.begin() as connection:
+        connection.execute(journal.insert(), {"id": "j2", "user_id": "u1", "content": "A new entry about gratitude", "date": "2024-01-02"})
+    with Session(legacy_engine) as db:
+        assert sorted(hit.id for hit in search(db, "u1", "gratitude", SEARCH_DOCUMENTS, 10, 0)) == ["j1", "j2"]
+        assert search(db, "u2", "gratitude", SEARCH_DOCUMENTS, 10, 0) == []
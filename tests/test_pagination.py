@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from pagination import DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from streaks import local_today
+
+
+def collect(client, path, headers, limit, **params):
+    items, cursor = [], None
+    while True:
+        response = client.get(path, params={"limit": limit, **params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        items.extend(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return items
+
+
+def test_same_day_journal_entries_page_newest_first(client, register):
+    headers = register()
+    for index in range(7):
+        client.post("/api/journal", json={"content": f"entry {index}"}, headers=headers)
+    entries = collect(client, "/api/journal", headers, limit=3)
+    assert [entry["content"] for entry in entries] == [f"entry {index}" for index in reversed(range(7))]
+
+
+def test_backdated_entries_page_by_day_then_creation(client, register):
+    headers = register()
+    today = local_today()
+    # Written out of order: the day sorts first, creation time only breaks ties within a day
+    for content, days_ago in [("b", 1), ("a", 0), ("d", 2), ("c", 1), ("e", 2)]:
+        operation = {"op": "journal.create", "data": {"content": content, "date": (today - timedelta(days=days_ago)).isoformat()}}
+        client.post("/api/batch", json={"operations": [operation]}, headers=headers)
+    for limit in (1, 2, 4):
+        assert [entry["content"] for entry in collect(client, "/api/journal", headers, limit)] == ["a", "c", "b", "e", "d"]
+
+
+def test_cursor_round_trips_typed_values(server):
+    columns = (server.JournalEntryDB.date, server.JournalEntryDB.created_at, server.JournalEntryDB.id)
+    values = ["2024-05-01", datetime(2024, 5, 1, 8, 30, 15, 123456), "entry-id"]
+    assert decode_cursor(encode_cursor(values), columns) == values
+
+
+def test_lists_default_to_a_bounded_page(client, register):
+    headers = register()
+    for index in range(DEFAULT_PAGE_SIZE + 1):
+        client.post("/api/exercises", json={"exercise_type": "reflection", "content": {"n": index}}, headers=headers)
+    response = client.get("/api/exercises", headers=headers)
+    assert len(response.json()) == DEFAULT_PAGE_SIZE
+    rest = client.get("/api/exercises", params={"cursor": response.headers[NEXT_CURSOR_HEADER]}, headers=headers)
+    assert len(rest.json()) == 1
+    assert NEXT_CURSOR_HEADER not in rest.headers
+
+
+def test_invalid_cursor_is_rejected(client, register):
+    headers = register()
+    assert client.get("/api/journal", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+    assert client.get("/api/journal", params={"limit": 0}, headers=headers).status_code == 422
+
+
+def test_sparse_fieldsets_page_with_the_same_keyset(client, register):
+    headers = register()
+    for index in range(3):
+        client.post("/api/journal", json={"content": f"entry {index}"}, headers=headers)
+    entries = collect(client, "/api/journal", headers, limit=1, fields="content")
+    assert entries == [{"content": f"entry {index}"} for index in reversed(range(3))]
@@ -0,0 +1,27 @@
+from cache import ReadCache, TTLCache
+
+
+def test_write_on_another_worker_is_a_miss(client, register, server, monkeypatch):
+    # Two per-process memory caches over one database, as with several workers
+    worker_a, worker_b = (ReadCache(TTLCache(maxsize=100, ttl=60), ttl=60) for _ in range(2))
+    headers = register()
+    monkeypatch.setattr(server, "read_cache", worker_a)
+    assert client.get("/api/goals", headers=headers).json() == []
+    assert client.get("/api/goals", headers=headers).json() == []
+    assert worker_a.hits == 1
+
+    monkeypatch.setattr(server, "read_cache", worker_b)
+    client.post("/api/goals", json={"title": "Read more"}, headers=headers)
+
+    monkeypatch.setattr(server, "read_cache", worker_a)
+    response = client.get("/api/goals", headers=headers)
+    assert [goal["title"] for goal in response.json()] == ["Read more"]
+    assert client.get("/api/goals", headers={**headers, "If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_analytics_is_keyed_on_versions(client, register, server, monkeypatch):
+    monkeypatch.setattr(server, "read_cache", ReadCache(TTLCache(maxsize=100, ttl=60), ttl=60))
+    headers = register()
+    assert client.get("/api/analytics/overview", headers=headers).json()["goals"]["total"] == 0
+    client.post("/api/goals", json={"title": "Learn Spanish"}, headers=headers)
+    assert client.get("/api/analytics/overview", headers=headers).json()["goals"]["total"] == 1
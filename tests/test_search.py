@@ -0,0 +1,33 @@
+def hits(client, headers, q, **params):
+    response = client.get("/api/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [(hit["collection"], hit["id"]) for hit in response.json()]
+
+
+def test_search_follows_inserts_updates_and_deletes(client, register):
+    headers = register()
+    obstacle = client.post("/api/obstacles", json={"obstacle_text": "Procrastination before exams"}, headers=headers).json()
+    assert hits(client, headers, "procrastination") == [("obstacles", obstacle["id"])]
+    # The last term matches as a prefix
+    assert hits(client, headers, "exa") == [("obstacles", obstacle["id"])]
+
+    client.put(f"/api/obstacles/{obstacle['id']}", json={"perception": "A chance to practise discipline"}, headers=headers)
+    assert hits(client, headers, "discipline") == [("obstacles", obstacle["id"])]
+
+    client.delete(f"/api/obstacles/{obstacle['id']}", headers=headers)
+    assert hits(client, headers, "procrastination") == []
+    assert hits(client, headers, "discipline") == []
+
+
+def test_search_is_scoped_to_the_user_and_collections(client, register):
+    owner, other = register(), register()
+    entry = client.post("/api/journal", json={"content": "Grateful for the morning sunrise"}, headers=owner).json()
+    client.post("/api/obstacles", json={"obstacle_text": "Missed the sunrise again"}, headers=owner)
+
+    assert len(hits(client, owner, "sunrise")) == 2
+    assert hits(client, owner, "sunrise", types="journal") == [("journal", entry["id"])]
+    assert hits(client, other, "sunrise") == []
+    result = client.get("/api/search", params={"q": "sunrise", "types": "journal"}, headers=owner).json()[0]
+    assert "<mark>sunrise</mark>" in result["highlight"]
+    assert result["item"]["content"] == entry["content"]
+    assert client.get("/api/search", params={"q": "sunrise", "types": "habits"}, headers=owner).status_code == 400
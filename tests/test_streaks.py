@@ -0,0 +1,55 @@
+from datetime import date, timezone
+
+from streaks import StreakState, advance, live_streak, replay, reset, resolve_timezone
+
+MAY_1 = date(2024, 5, 1)
+MAY_2 = date(2024, 5, 2)
+MAY_3 = date(2024, 5, 3)
+MAY_5 = date(2024, 5, 5)
+
+
+def test_consecutive_days_extend_the_streak():
+    state = advance(advance(advance(StreakState(), MAY_1), MAY_2), MAY_3)
+    assert state == StreakState(3, 3, MAY_3)
+
+
+def test_gap_restarts_the_streak_but_keeps_the_best():
+    state = advance(StreakState(3, 3, MAY_3), MAY_5)
+    assert state == StreakState(1, 3, MAY_5)
+
+
+def test_repeat_and_earlier_days_are_ignored():
+    state = StreakState(2, 4, MAY_2)
+    assert advance(state, MAY_2) is state
+    assert advance(state, MAY_1) is state
+
+
+def test_reset_clears_the_current_streak_from_that_day():
+    assert reset(StreakState(2, 4, MAY_2), MAY_3) == StreakState(0, 4, MAY_3)
+    # A failure recorded late doesn't undo successes logged after it
+    state = StreakState(2, 4, MAY_3)
+    assert reset(state, MAY_2) is state
+
+
+def test_replay_orders_and_deduplicates_days():
+    assert replay([MAY_3, MAY_1, MAY_2, MAY_2, MAY_5]) == StreakState(1, 3, MAY_5)
+    assert replay([]) == StreakState()
+
+
+def test_live_streak_survives_until_a_full_day_is_missed():
+    state = StreakState(3, 3, MAY_3)
+    assert live_streak(state, MAY_3) == 3
+    assert live_streak(state, date(2024, 5, 4)) == 3
+    assert live_streak(state, MAY_5) == 0
+    assert live_streak(StreakState(), MAY_5) == 0
+
+
+def test_from_columns_accepts_nulls_and_timestamps():
+    assert StreakState.from_columns(None, None, None) == StreakState()
+    assert StreakState.from_columns(2, 5, "2024-05-03T08:00:00") == StreakState(2, 5, MAY_3)
+
+
+def test_unknown_timezones_fall_back_to_utc():
+    assert resolve_timezone(None) is timezone.utc
+    assert resolve_timezone("Not/AZone") is timezone.utc
+    assert resolve_timezone("Europe/Paris").key == "Europe/Paris"
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+
+def sync_all(client, headers, limit, since=None):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"since": since} if since else {}), **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/sync", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = pages[-1]["cursor"]
+        if not cursor:
+            return pages
+
+
+def test_first_sync_is_paged_per_collection(client, register, server):
+    headers = register()
+    entries = [client.post("/api/journal", json={"content": f"entry {index}"}, headers=headers).json()["id"] for index in range(5)]
+    obstacles = [client.post("/api/obstacles", json={"obstacle_text": f"obstacle {index}"}, headers=headers).json()["id"] for index in range(3)]
+    # Equal timestamps straddle page boundaries; the id tie-breaker must still send each row once
+    with server.SessionLocal() as db:
+        db.query(server.JournalEntryDB).filter(server.JournalEntryDB.id.in_(entries)).update({"updated_at": datetime(2024, 1, 1)}, synchronize_session=False)
+        db.commit()
+
+    pages = sync_all(client, headers, limit=2)
+    assert len(pages) == 3
+    assert all(len(rows) <= 2 for page in pages for rows in page["changes"].values())
+    # Until the run completes the client keeps its old watermark
+    assert [page["watermark"] is None for page in pages] == [True, True, False]
+    for name, ids in (("journal", entries), ("obstacles", obstacles)):
+        assert sorted(row["id"] for page in pages for row in page["changes"].get(name, [])) == sorted(ids)
+
+    for obstacle_id in obstacles:
+        client.delete(f"/api/obstacles/{obstacle_id}", headers=headers)
+    since = pages[-1]["watermark"]
+    deleted = sync_all(client, headers, limit=2, since=since)
+    assert sorted(row_id for page in deleted for row_id in page["deleted"].get("obstacles", [])) == sorted(obstacles)
+    assert [page["watermark"] for page in deleted] == [since, deleted[-1]["watermark"]]
+    assert deleted[-1]["watermark"] >= since
+
+
+def test_invalid_sync_cursor_is_rejected(client, register):
+    headers = register()
+    assert client.get("/api/sync", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+    assert client.get("/api/sync", params={"limit": 0}, headers=headers).status_code == 422
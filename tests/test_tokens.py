@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from tokens import TokenDenylist
+
+
+def test_only_one_caller_claims_a_due_refresh():
+    denylist = TokenDenylist(refresh_interval=60)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        claims = list(pool.map(lambda _: denylist.claim_refresh(), range(64)))
+    assert claims.count(True) == 1
+    assert denylist.claim_refresh() is False
+
+
+def test_logout_revokes_the_token(client, register):
+    headers = register()
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/goals", headers=headers).status_code == 401
+
+
+def test_revocation_from_another_worker_is_picked_up(client, register, server):
+    headers = register()
+    assert client.get("/api/goals", headers=headers).status_code == 200
+    claims = server.decode_token(headers["Authorization"].split()[1])
+    with server.SessionLocal() as db:
+        db.add(server.RevokedTokenDB(
+            jti=claims.jti, user_id=claims.user_id,
+            expires_at=datetime.fromtimestamp(claims.exp, timezone.utc), created_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+        ))
+        db.commit()
+    server.load_revocations()
+    assert client.get("/api/goals", headers=headers).status_code == 401